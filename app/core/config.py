@@ -0,0 +1,4 @@
+from dotenv import load_dotenv
+
+# The single place .env is loaded. Modules that read settings from the environment at import time import this module first.
+load_dotenv()
@@ -0,0 +1,71 @@
+"""
+Import-time profile of the application, built on `python -X importtime`.
+
+    python -m app.core.import_profile [--module app.main] [--top 15] [--repeat 5]
+
+Each run imports the module in a fresh interpreter and reports the median total import time,
+the heaviest third-party packages and the slowest application modules.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+LINE_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def profile_once(module: str | None) -> dict[str, tuple[int, int, int]]:
+    """Returns {module: (self µs, cumulative µs, nesting depth)} for one cold import (or a bare interpreter start)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}" if module else "pass"],
+        capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            timings[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the import time of the application.")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5, help="Cold imports to take the median of")
+    args = parser.parse_args()
+
+    runs = [profile_once(args.module) for _ in range(args.repeat)]
+    # Modules the interpreter imports on its own (site, .pth files) are not the application's cost
+    startup = set(profile_once(None))
+    names = set().union(*runs) - startup
+    median = {
+        name: (
+            statistics.median(run.get(name, (0, 0, 0))[0] for run in runs),
+            statistics.median(run.get(name, (0, 0, 0))[1] for run in runs),
+        )
+        for name in names
+    }
+
+    print(f"{args.module}: {median.get(args.module, (0, 0))[1] / 1000:.1f} ms total (median of {args.repeat} cold imports)\n")
+
+    # Only top-level packages, so a package's cumulative time is not counted again for each submodule
+    packages = {}
+    for name, (_, cumulative) in median.items():
+        root = name.split(".")[0]
+        if root != "app" and name == root:
+            packages[root] = cumulative
+    print("Heaviest packages (cumulative ms):")
+    for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}  {name}")
+
+    print("\nSlowest application modules (self ms):")
+    app_modules = {name: timing for name, timing in median.items() if name.startswith("app.")}
+    for name, (self_us, _) in sorted(app_modules.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1000:8.1f}  {name}")
+
+if __name__ == "__main__":
+    main()
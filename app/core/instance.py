@@ -0,0 +1,36 @@
+"""
+Identity of this orchestrator process among the instances sharing a database.
+
+Runs record the instance that created or claimed them. On PostgreSQL every instance holds an advisory lock keyed on
+its id for as long as it lives, so the scheduler leader can tell which unfinished runs belong to instances that are gone.
+"""
+import secrets
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+INSTANCE_ID = secrets.randbelow(2**31 - 1) + 1 # Fits PostgreSQL's int advisory lock keys
+INSTANCE_LOCK_KEY = 7_364_814 # First key of the (key, instance id) advisory lock a live instance holds
+
+def register(engine: Engine) -> Connection | None:
+    """Takes this instance's liveness lock on a dedicated connection, which must stay open while the instance runs."""
+    if engine.dialect.name != "postgresql":
+        return None # Other backends are served by a single instance
+    connection = engine.connect()
+    try:
+        connection.execute(text("SELECT pg_advisory_lock(:key, :instance_id)"), {"key": INSTANCE_LOCK_KEY, "instance_id": INSTANCE_ID})
+        connection.commit()
+    except Exception:
+        connection.close()
+        raise
+    return connection
+
+def live_instance_ids(connection: Connection) -> set[int]:
+    """Ids of the instances currently holding their liveness lock, this one included."""
+    if connection.dialect.name != "postgresql":
+        return {INSTANCE_ID}
+    rows = connection.execute(text(
+        "SELECT objid::bigint FROM pg_locks"
+        " WHERE locktype = 'advisory' AND granted AND classid::bigint = :key AND objsubid = 2"
+        " AND database = (SELECT oid FROM pg_database WHERE datname = current_database())"
+    ), {"key": INSTANCE_LOCK_KEY})
+    return {instance_id for (instance_id,) in rows} | {INSTANCE_ID}
@@ -1,19 +1,185 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from app.core import config # Loads .env before the settings below are read
 
-def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler("orchestrator.log")
-        ]
+LOG_FILE = os.getenv("LOG_FILE", "orchestrator.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text") # text or json
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size") # size or time
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_ROTATION_WHEN = os.getenv("LOG_ROTATION_WHEN", "midnight")
+RUN_LOG_DIR = os.getenv("RUN_LOG_DIR", "") # When set, each run also gets its own log file
+RUN_LOG_RETENTION_DAYS = float(os.getenv("RUN_LOG_RETENTION_DAYS", "30")) # 0 keeps run log files forever
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_run_id = contextvars.ContextVar("run_id", default=None)
+_project_id = contextvars.ContextVar("project_id", default=None)
+
+_listener = None
+
+@contextmanager
+def log_context(run_id: int = None, project_id: int = None):
+    """Tags every record logged inside the block with the given run/project IDs."""
+    run_token = _run_id.set(run_id)
+    project_token = _project_id.set(project_id)
+    try:
+        yield
+    finally:
+        _run_id.reset(run_token)
+        _project_id.reset(project_token)
+
+class ContextFilter(logging.Filter):
+    # Runs on the emitting thread, before the record is queued, so the contextvars are still visible
+    def filter(self, record):
+        record.run_id = _run_id.get()
+        record.project_id = _project_id.get()
+        return True
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records with their message merged but the traceback kept in exc_text: since Python 3.12
+    QueueHandler.prepare() folds it into the message and clears exc_text, which hid it from JsonFormatter.
+    """
+    def prepare(self, record):
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None # Already rendered into exc_text; dropping it releases the frames
+        record.exc_text = exc_text
+        return record
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "run_id", None) is not None:
+            payload["run_id"] = record.run_id
+        if getattr(record, "project_id", None) is not None:
+            payload["project_id"] = record.project_id
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload)
+
+class RunLogHandler(logging.Handler):
+    """Appends records carrying a run_id to `<RUN_LOG_DIR>/run_<id>.log`."""
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def emit(self, record):
+        run_id = getattr(record, "run_id", None)
+        if run_id is None:
+            return
+        try:
+            with open(os.path.join(self.directory, f"run_{run_id}.log"), "a", encoding="utf-8") as f:
+                f.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+def _run_log_path(run_id: int) -> str:
+    return os.path.join(RUN_LOG_DIR, f"run_{run_id}.log")
+
+def delete_run_logs(run_ids: list[int]):
+    """Removes the log files of deleted runs."""
+    if not RUN_LOG_DIR:
+        return
+    for run_id in run_ids:
+        try:
+            os.remove(_run_log_path(run_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            get_logger().warning(f"Could not remove the log file of run {run_id}: {e}")
+
+def prune_run_logs():
+    """Removes run log files not written to for RUN_LOG_RETENTION_DAYS."""
+    if not RUN_LOG_DIR or RUN_LOG_RETENTION_DAYS <= 0 or not os.path.isdir(RUN_LOG_DIR):
+        return
+    cutoff = time.time() - RUN_LOG_RETENTION_DAYS * 86400
+    for entry in os.scandir(RUN_LOG_DIR):
+        if entry.name.startswith("run_") and entry.name.endswith(".log") and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+def _build_formatter():
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+def _build_file_handler():
+    if LOG_ROTATION == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            LOG_FILE, when=LOG_ROTATION_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
     )
+
+def get_logger():
+    """Returns the application logger. Importing modules only fetch it; handlers are installed once by setup_logging() at startup."""
+    return logging.getLogger(__name__)
+
+def setup_logging():
+    global _listener
+    if _listener is None:
+        formatter = _build_formatter()
+        handlers = [logging.StreamHandler(sys.stdout), _build_file_handler()]
+        if RUN_LOG_DIR:
+            handlers.append(RunLogHandler(RUN_LOG_DIR))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        # Callers only pay for a queue put; formatting and disk I/O happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        queue_handler = ContextQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        prune_run_logs()
+
     # Suppress verbose logging from some libraries
     logging.getLogger("uvicorn").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
     logging.getLogger("apscheduler").setLevel(logging.WARNING)
 
-    return logging.getLogger(__name__)
+    return get_logger()
+
+def shutdown_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
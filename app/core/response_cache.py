@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "5"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+class _Entry:
+    def __init__(self, version: int, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.expires_at = time.monotonic() + RESPONSE_CACHE_TTL_SECONDS
+
+class ResponseCache:
+    """
+    In-process cache of serialised JSON responses. Every committed write bumps the data version, which invalidates
+    all entries at once; the TTL bounds staleness for writes made by other processes sharing the database.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def get(self, key) -> _Entry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != self.version or entry.expires_at < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version: int, body: bytes) -> _Entry:
+        entry = _Entry(version, body)
+        with self._lock:
+            # A write committed while the body was built makes it stale, so only the current version is stored
+            if version == self.version and RESPONSE_CACHE_TTL_SECONDS > 0:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+response_cache = ResponseCache()
+
+@event.listens_for(Session, "after_flush")
+def _mark_session_dirty(session, flush_context):
+    session.info["response_cache_dirty"] = True
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _mark_session_dirty_on_bulk(update_context):
+    # Query.update() and Query.delete() bypass the flush
+    update_context.session.info["response_cache_dirty"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("response_cache_dirty", False):
+        response_cache.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop("response_cache_dirty", None)
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> set[str] | None:
+    """Parses a comma-separated `?fields=` value into the set of schema fields to return."""
+    if not fields:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return selected
+
+def serialize(obj, schema: type[BaseModel], fields: set[str] | None = None):
+    """Serialises an ORM object (or a list of them) through the schema, keeping only the selected fields."""
+    if isinstance(obj, list):
+        return [serialize(item, schema, fields) for item in obj]
+    return schema.model_validate(obj).model_dump(mode="json", include=fields)
+
+def cached_json_response(request: Request, build: Callable[[], Any]) -> Response:
+    """
+    Returns the JSON produced by build() for this request's path and query, from the cache when possible.
+    Responses carry an ETag, and a matching If-None-Match is answered with 304 Not Modified.
+    """
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    entry = response_cache.get(key)
+    if entry is None:
+        version = response_cache.version
+        body = json.dumps(jsonable_encoder(build()), separators=(",", ":")).encode()
+        entry = response_cache.put(key, version, body)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or entry.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -1,6 +1,5 @@
-import pytz
-
 def get_timezones():
+    import pytz # Only the schedule forms need the timezone list
     # Return a sorted list of common timezones
     # You can filter this list if you want to provide a smaller, more curated selection
     return sorted(pytz.all_timezones)
@@ -0,0 +1,18 @@
+from sqlalchemy.orm import Session
+from app.models.artifact import Artifact
+from app.schemas.artifact import ArtifactCreate
+
+def get_artifact(db: Session, artifact_id: int):
+    return db.query(Artifact).filter(Artifact.id == artifact_id).first()
+
+def get_artifacts_by_run_id(db: Session, run_id: int):
+    return db.query(Artifact).filter(Artifact.run_id == run_id).order_by(Artifact.path).all()
+
+def create_artifacts(db: Session, artifacts: list[ArtifactCreate]):
+    db_artifacts = [Artifact(**artifact.model_dump()) for artifact in artifacts]
+    db.add_all(db_artifacts)
+    db.commit()
+    return db_artifacts
+
+def get_referenced_hashes(db: Session) -> set[str]:
+    return {sha256 for (sha256,) in db.query(Artifact.sha256).distinct()}
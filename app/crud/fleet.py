@@ -0,0 +1,104 @@
+from sqlalchemy.orm import Session
+from app.models.project import Project
+from app.models.schedule import Schedule
+from app.schemas.fleet import Fleet, FleetChange, FleetProject, FleetSchedule
+from app.schemas.project import ProjectBase
+from app.schemas.schedule import Schedule as ScheduleSchema
+
+PROJECT_FIELDS = list(ProjectBase.model_fields)
+SCHEDULE_FIELDS = list(FleetSchedule.model_fields)
+
+def export_fleet(db: Session) -> Fleet:
+    projects = db.query(Project).order_by(Project.name).all()
+    schedules_by_project = {}
+    for schedule in db.query(Schedule).order_by(Schedule.name).all():
+        schedules_by_project.setdefault(schedule.project_id, []).append(schedule)
+
+    return Fleet(projects=[
+        FleetProject(
+            **{field: getattr(project, field) for field in PROJECT_FIELDS},
+            schedules=[
+                FleetSchedule(**{field: getattr(schedule, field) for field in SCHEDULE_FIELDS})
+                for schedule in schedules_by_project.get(project.id, [])
+            ],
+        )
+        for project in projects
+    ])
+
+def _diff(db_object, values: dict) -> dict:
+    return {
+        field: [getattr(db_object, field), value]
+        for field, value in values.items()
+        if getattr(db_object, field) != value
+    }
+
+def import_fleet(db: Session, fleet: Fleet, dry_run: bool = False):
+    """
+    Upserts projects (matched by name) and their schedules (matched by project and name) in a single transaction.
+    Returns the list of changes and the created or updated schedules, which need (re)registering with the scheduler.
+    """
+    names = [project.name for project in fleet.projects]
+    existing_projects = {project.name: project for project in db.query(Project).filter(Project.name.in_(names)).all()}
+    existing_schedules = {}
+    if existing_projects:
+        project_ids = [project.id for project in existing_projects.values()]
+        for schedule in db.query(Schedule).filter(Schedule.project_id.in_(project_ids)).all():
+            existing_schedules[(schedule.project_id, schedule.name)] = schedule
+
+    changes = []
+    new_projects = []
+    pending_schedules = [] # (db_project, FleetSchedule) pairs for projects that have no id yet
+    touched_schedules = []
+
+    for fleet_project in fleet.projects:
+        project_values = fleet_project.model_dump(include=set(PROJECT_FIELDS))
+        db_project = existing_projects.get(fleet_project.name)
+        if db_project is None:
+            db_project = Project(**project_values)
+            new_projects.append(db_project)
+            changes.append(FleetChange(kind="project", action="create", project=fleet_project.name))
+            for fleet_schedule in fleet_project.schedules:
+                pending_schedules.append((db_project, fleet_schedule))
+                changes.append(FleetChange(kind="schedule", action="create", project=fleet_project.name, schedule=fleet_schedule.name))
+            continue
+
+        project_diff = _diff(db_project, project_values)
+        changes.append(FleetChange(kind="project", action="update" if project_diff else "unchanged", project=fleet_project.name, changes=project_diff))
+        if project_diff and not dry_run:
+            for field, (_, value) in project_diff.items():
+                setattr(db_project, field, value)
+
+        for fleet_schedule in fleet_project.schedules:
+            schedule_values = fleet_schedule.model_dump()
+            db_schedule = existing_schedules.get((db_project.id, fleet_schedule.name))
+            if db_schedule is None:
+                pending_schedules.append((db_project, fleet_schedule))
+                changes.append(FleetChange(kind="schedule", action="create", project=fleet_project.name, schedule=fleet_schedule.name))
+                continue
+            schedule_diff = _diff(db_schedule, schedule_values)
+            changes.append(FleetChange(kind="schedule", action="update" if schedule_diff else "unchanged", project=fleet_project.name, schedule=fleet_schedule.name, changes=schedule_diff))
+            if schedule_diff and not dry_run:
+                for field, (_, value) in schedule_diff.items():
+                    setattr(db_schedule, field, value)
+                touched_schedules.append(db_schedule)
+
+    if dry_run:
+        return changes, []
+
+    try:
+        db.add_all(new_projects)
+        db.flush() # Assigns ids to the new projects with one batched INSERT
+        new_schedules = [
+            Schedule(project_id=db_project.id, **fleet_schedule.model_dump())
+            for db_project, fleet_schedule in pending_schedules
+        ]
+        db.add_all(new_schedules)
+        db.flush()
+        # Snapshot before commit expires the instances, to avoid one SELECT per schedule afterwards
+        registered = [ScheduleSchema.model_validate(schedule) for schedule in touched_schedules + new_schedules]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return changes, registered
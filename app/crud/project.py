@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.project import Project
 from app.schemas.project import ProjectCreate
+from app.services.admission import learn
 
 def get_project(db: Session, project_id: int):
     return db.query(Project).filter(Project.id == project_id).first()
@@ -29,4 +30,12 @@ def delete_project(db: Session, project_id: int):
     if db_project:
         db.delete(db_project)
         db.commit()
-    return db_project
\ No newline at end of file
+    return db_project
+
+def update_learned_weights(db: Session, project_id: int, cpu_weight: float, memory_mb: float):
+    db_project = db.query(Project).filter(Project.id == project_id).first()
+    if db_project:
+        db_project.learned_cpu_weight = learn(db_project.learned_cpu_weight, cpu_weight)
+        db_project.learned_memory_mb = learn(db_project.learned_memory_mb, memory_mb)
+        db.commit()
+    return db_project
@@ -1,36 +1,205 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, defer
 from app.models.run import Run
 from app.schemas.run import RunCreate
 from datetime import datetime
+from app.core.instance import INSTANCE_ID
+from app.services.events import publish_run_event
+from app.services import run_stats
 
 def get_run(db: Session, run_id: int):
     return db.query(Run).filter(Run.id == run_id).first()
 
-def get_runs(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Run).order_by(Run.start_time.desc()).offset(skip).limit(limit).all()
+def get_runs(db: Session, skip: int = 0, limit: int = 100, include_log: bool = True):
+    query = db.query(Run)
+    if not include_log:
+        query = query.options(defer(Run.log_output)) # Log bodies dominate the row size
+    return query.order_by(Run.start_time.desc()).offset(skip).limit(limit).all()
 
 def get_runs_by_project_id(db: Session, project_id: int, page: int = 1, page_size: int = 10):
     offset = (page - 1) * page_size
     return db.query(Run).filter(Run.project_id == project_id).order_by(Run.start_time.desc()).offset(offset).limit(page_size).all()
 
+def get_run_ids_by_project_id(db: Session, project_id: int) -> list[int]:
+    return [run_id for (run_id,) in db.query(Run.id).filter(Run.project_id == project_id)]
+
 def get_runs_count_by_project_id(db: Session, project_id: int):
     return db.query(Run).filter(Run.project_id == project_id).count()
 
 def create_run(db: Session, run: RunCreate):
-    db_run = Run(**run.model_dump())
+    db_run = Run(**run.model_dump(), instance_id=INSTANCE_ID)
     db.add(db_run)
     db.commit()
     db.refresh(db_run)
+    publish_run_event(db_run, "queued")
     return db_run
 
+def claim_run(db: Session, run_id: int) -> bool:
+    """
+    Moves a pending or queued run to running in a single conditional UPDATE, so a run is executed once even when
+    it is dispatched twice (e.g. by instances sharing a database). Returns False when the run was already claimed.
+    """
+    claimed = db.query(Run).filter(Run.id == run_id, Run.status.in_(("pending", "queued"))).update(
+        {Run.status: "running", Run.started_at: datetime.now(), Run.instance_id: INSTANCE_ID}, synchronize_session=False
+    )
+    db.commit()
+    if claimed:
+        db_run = db.query(Run).filter(Run.id == run_id).first()
+        db.refresh(db_run)
+        publish_run_event(db_run, "running")
+    return bool(claimed)
+
+def mark_run_queued(db: Session, run_id: int) -> bool:
+    """Marks a pending run as queued by admission control; a run that was admitted in the meantime is left alone."""
+    queued = db.query(Run).filter(Run.id == run_id, Run.status == "pending").update(
+        {Run.status: "queued", Run.instance_id: INSTANCE_ID}, synchronize_session=False
+    )
+    db.commit()
+    if queued:
+        db_run = db.query(Run).filter(Run.id == run_id).first()
+        db.refresh(db_run)
+        publish_run_event(db_run, "queued")
+    return bool(queued)
+
+def lock_run_for_retry(db: Session, run_id: int):
+    """
+    Row-locks a failed run until the transaction ends, skipping it when another transaction holds the lock
+    (None is returned then). Serialises retries of the same run across instances; SQLite's single writer does that anyway.
+    """
+    return db.query(Run).filter(Run.id == run_id, Run.status == "failed").with_for_update(skip_locked=True).first()
+
+def get_running_run_ids(db: Session, run_ids: list[int]) -> set[int]:
+    if not run_ids:
+        return set()
+    return {run_id for (run_id,) in db.query(Run.id).filter(Run.id.in_(run_ids), Run.status == "running")}
+
+def get_orphaned_runs(db: Session, live_instance_ids: set[int]):
+    """Pending, queued and running runs whose instance is gone, oldest first."""
+    return db.query(Run).filter(
+        Run.status.in_(("pending", "queued", "running")),
+        (Run.instance_id.is_(None)) | (Run.instance_id.notin_(live_instance_ids)),
+    ).order_by(Run.start_time).all()
+
+def adopt_run(db: Session, run_id: int, status: str, instance_id: int | None) -> bool:
+    """Makes this instance the owner of an orphaned run, unless its status or owner changed in the meantime."""
+    owner = Run.instance_id.is_(None) if instance_id is None else Run.instance_id == instance_id
+    adopted = db.query(Run).filter(Run.id == run_id, Run.status == status, owner).update(
+        {Run.instance_id: INSTANCE_ID}, synchronize_session=False
+    )
+    db.commit()
+    return bool(adopted)
+
 def update_run_status(db: Session, run_id: int, status: str, log_output: str = None):
     db_run = db.query(Run).filter(Run.id == run_id).first()
     if db_run:
         db_run.status = status
-        if status in ["completed", "failed"]:
+        if status in ["completed", "failed", "skipped"]:
             db_run.end_time = datetime.now()
         if log_output:
             db_run.log_output = log_output
+        if status in ["completed", "failed"]:
+            # The schedule and project statistics are updated in the same transaction as the run
+            with run_stats.lock:
+                run_stats.record_run(db, db_run)
+                db.commit()
+        else:
+            db.commit()
+        db.refresh(db_run)
+        publish_run_event(db_run, status)
+    return db_run
+
+def get_last_successful_run(db: Session, project_id: int):
+    return db.query(Run).filter(
+        Run.project_id == project_id,
+        Run.status == "completed",
+    ).order_by(Run.end_time.desc()).first()
+
+def set_run_fingerprint(db: Session, run_id: int, fingerprint: str):
+    db_run = db.query(Run).filter(Run.id == run_id).first()
+    if db_run:
+        db_run.fingerprint = fingerprint
+        db.commit()
+        db.refresh(db_run)
+    return db_run
+
+def set_run_commit(db: Session, run_id: int, commit_sha: str):
+    db_run = db.query(Run).filter(Run.id == run_id).first()
+    if db_run:
+        db_run.commit_sha = commit_sha
         db.commit()
         db.refresh(db_run)
     return db_run
+
+def mark_run_cached(db: Session, run_id: int, fingerprint: str, cached_from_run_id: int, log_output: str):
+    db_run = db.query(Run).filter(Run.id == run_id).first()
+    if db_run:
+        db_run.fingerprint = fingerprint
+        db_run.cached_from_run_id = cached_from_run_id
+    # Committed together with the status change
+    return update_run_status(db, run_id, "skipped", log_output)
+
+def record_failure(db: Session, run_id: int, phase: str, exit_code: int | None, log_output: str):
+    db_run = db.query(Run).filter(Run.id == run_id).first()
+    if db_run:
+        db_run.failure_phase = phase
+        db_run.exit_code = exit_code
+    # Committed together with the status change
+    return update_run_status(db, run_id, "failed", log_output)
+
+def set_next_retry_at(db: Session, run_id: int, next_retry_at: datetime | None):
+    db_run = db.query(Run).filter(Run.id == run_id).first()
+    if db_run:
+        db_run.next_retry_at = next_retry_at
+        db.commit()
+        db.refresh(db_run)
+    return db_run
+
+def get_runs_awaiting_retry(db: Session):
+    return db.query(Run).filter(Run.status == "failed", Run.next_retry_at.isnot(None)).all()
+
+def get_retry_of_run(db: Session, run_id: int):
+    return db.query(Run).filter(Run.retry_of_run_id == run_id).first()
+
+def create_retry_run(db: Session, previous_run: Run):
+    db_run = Run(
+        project_id=previous_run.project_id,
+        schedule_id=previous_run.schedule_id,
+        attempt=(previous_run.attempt or 1) + 1,
+        retry_of_run_id=previous_run.id,
+        instance_id=INSTANCE_ID,
+    )
+    previous_run.next_retry_at = None
+    db.add(db_run)
+    db.commit()
+    db.refresh(db_run)
+    publish_run_event(db_run, "queued")
+    return db_run
+
+def record_usage(db: Session, run_id: int, peak_memory_mb: float, cpu_seconds: float):
+    db_run = db.query(Run).filter(Run.id == run_id).first()
+    if db_run:
+        db_run.peak_memory_mb = peak_memory_mb
+        db_run.cpu_seconds = cpu_seconds
+        db.commit()
+    return db_run
+
+def get_recent_durations(db: Session, per_project: int = 50) -> dict[int, list[float]]:
+    """
+    Returns the execution times in seconds of each project's latest completed (not cached) runs, measured from when
+    execution began, so historical queueing is not counted again on top of the simulated queueing.
+    """
+    ranked = (
+        db.query(
+            Run.project_id,
+            func.coalesce(Run.started_at, Run.start_time).label("started_at"),
+            Run.end_time,
+            func.row_number().over(partition_by=Run.project_id, order_by=Run.start_time.desc()).label("rank"),
+        )
+        .filter(Run.status == "completed", Run.end_time.isnot(None), Run.cached_from_run_id.is_(None))
+        .subquery()
+    )
+    rows = db.query(ranked.c.project_id, ranked.c.started_at, ranked.c.end_time).filter(ranked.c.rank <= per_project).all()
+    durations = {}
+    for project_id, started_at, end_time in rows:
+        durations.setdefault(project_id, []).append(max((end_time - started_at).total_seconds(), 0.0))
+    return durations
@@ -0,0 +1,16 @@
+from sqlalchemy.orm import Session
+from app.models.run_stats import RunStats
+
+def get_run_stats(db: Session, scope: str, scope_id: int):
+    return db.query(RunStats).filter(RunStats.scope == scope, RunStats.scope_id == scope_id).first()
+
+def get_run_stats_list(db: Session, scope: str, skip: int = 0, limit: int = 100):
+    return db.query(RunStats).filter(RunStats.scope == scope).order_by(RunStats.scope_id).offset(skip).limit(limit).all()
+
+def get_or_create_run_stats(db: Session, scope: str, scope_id: int):
+    """Returns the aggregate row locked for update (where the database supports it), adding it to the session if new."""
+    db_stats = db.query(RunStats).filter(RunStats.scope == scope, RunStats.scope_id == scope_id).with_for_update().first()
+    if db_stats is None:
+        db_stats = RunStats(scope=scope, scope_id=scope_id, run_count=0, success_count=0, duration_samples=0, anomaly_count=0)
+        db.add(db_stats)
+    return db_stats
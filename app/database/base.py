@@ -1,16 +1,44 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
-from dotenv import load_dotenv
-
-load_dotenv() # Load environment variables from .env file
+from app.core import config # Loads .env before DATABASE_URL is read
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./orchestrator.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def engine_options(url: str) -> dict:
+    """Connection and pool settings suited to the database backend of the URL."""
+    if make_url(url).get_backend_name() == "sqlite":
+        # Sessions are used from executor and scheduler threads
+        return {"connect_args": {"check_same_thread": False}}
+    # Server databases: size the pool for concurrent runs, and drop connections the server closed while idle
+    return {
+        "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DATABASE_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DATABASE_POOL_TIMEOUT_SECONDS", "30")),
+        "pool_recycle": int(os.getenv("DATABASE_POOL_RECYCLE_SECONDS", "1800")),
+        "pool_pre_ping": True,
+    }
+
+def make_engine(url: str):
+    engine = create_engine(url, **engine_options(url))
+    if engine.dialect.name == "sqlite" and make_url(url).database not in (None, "", ":memory:"):
+        journal_mode = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+        busy_timeout_ms = int(float(os.getenv("SQLITE_BUSY_TIMEOUT_SECONDS", "30")) * 1000)
+
+        @event.listens_for(engine, "connect")
+        def _configure_sqlite(dbapi_connection, connection_record):
+            # WAL lets readers (the UI and API) proceed while a run is being written; writers wait instead of failing
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+            cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+            if journal_mode.lower() == "wal":
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+    return engine
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
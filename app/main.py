@@ -1,29 +1,70 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Form, Depends, BackgroundTasks, HTTPException # Import HTTPException
 from fastapi.staticfiles import StaticFiles # Import StaticFiles
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from app.database.base import engine, Base, SessionLocal
-from app.routes import projects, schedules, runs
+from app.database.base import SessionLocal, engine
+from app.database.migrations import migrate
+from app.routes import projects, schedules, runs, fleet, events, artifacts, admission, simulation, stats
 from app.services.scheduler import SchedulerService
 from app.crud import schedule as crud_schedule
 from app.crud import project as crud_project
 from app.crud import run as crud_run
+from app.crud import run_stats as crud_run_stats
 from app.schemas import project as schema_project
 from app.schemas import schedule as schema_schedule
 from app.schemas import run as schema_run
 from app.services.executor import execute_script, sync_project_dependencies # Import sync_project_dependencies
+from app.services.worker_pool import worker_pool
+from app.services.events import event_bus
+from app.services.artifacts import delete_unreferenced_blobs
+from app.services.checkouts import cleanup_stale_worktrees
 import math # Import math for ceil
-from app.core.logging_config import setup_logging # Import setup_logging
+from app.core.logging_config import delete_run_logs, get_logger, setup_logging, shutdown_logging
 from app.core.utils import get_timezones # Import get_timezones
+from app.core import instance
 from typing import List # Import List
 
-# Setup logging as early as possible
-logger = setup_logging()
+logger = get_logger()
 
-Base.metadata.create_all(bind=engine)
+def start_scheduler() -> SchedulerService:
+    scheduler_service = SchedulerService(SessionLocal())
+    scheduler_service.start() # Loads the schedules and pending retries once this instance runs the scheduler
+    return scheduler_service
 
-app = FastAPI()
+def cleanup_worktrees():
+    # Worktrees of runs interrupted by a crash or restart are never removed by their run
+    db = SessionLocal()
+    try:
+        cleanup_stale_worktrees(db, crud_project.get_projects(db, limit=None))
+    except Exception as e:
+        logger.warning(f"Could not clean up stale worktrees: {e}")
+    finally:
+        db.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Side effects live here rather than at import time, so importing the app (tests, tooling) stays cheap
+    setup_logging()
+    migrate()
+    app.state.instance_lock = instance.register(engine) # Before the scheduler, whose leader recovers runs of stopped instances
+    app.state.scheduler = start_scheduler()
+    cleanup_worktrees() # After recovery has failed the runs this instance was executing before a restart
+    event_bus.close_on_exit_signals()
+    logger.info("Application startup complete. Scheduler started.")
+    try:
+        yield
+    finally:
+        event_bus.close() # Ends open event streams
+        app.state.scheduler.shutdown()
+        worker_pool.shutdown()
+        if app.state.instance_lock is not None:
+            app.state.instance_lock.close()
+        logger.info("Application shutdown complete. Scheduler stopped.")
+        shutdown_logging()
+
+app = FastAPI(lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -37,23 +78,6 @@ def get_db():
     finally:
         db.close()
 
-@app.on_event("startup")
-def startup_event():
-    db = SessionLocal()
-    scheduler_service = SchedulerService(db)
-    schedules = crud_schedule.get_schedules(db)
-    for schedule in schedules:
-        logger.info(f"Scheduling job {schedule.id} with cron: {schedule.cron_schedule} in timezone {schedule.timezone}")
-        scheduler_service.schedule_job(schedule.id, schedule.project_id, schedule.cron_schedule, schedule.timezone)
-    scheduler_service.start()
-    app.state.scheduler = scheduler_service
-    logger.info("Application startup complete. Scheduler started.")
-
-@app.on_event("shutdown")
-def shutdown_event():
-    app.state.scheduler.shutdown()
-    logger.info("Application shutdown complete. Scheduler stopped.")
-
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request, db: Session = Depends(get_db)):
     projects_data = crud_project.get_projects(db)
@@ -78,17 +102,50 @@ async def create_project_from_form(
     main_script: str = Form(...),
     arguments: str = Form(None),
     environment_type: str = Form(...),
+    cache_enabled: bool = Form(False),
+    cache_ttl_seconds: str = Form(None),
+    cache_inputs: str = Form(None),
+    retry_max_attempts: str = Form(None),
+    retry_backoff_seconds: str = Form(None),
+    retry_backoff_max_seconds: str = Form(None),
+    retry_on: str = Form(None),
+    retry_exit_codes: str = Form(None),
+    execution_mode: str = Form("subprocess"),
+    preload_modules: str = Form(None),
+    artifact_paths: str = Form(None),
+    priority: str = Form(None),
+    cpu_weight: str = Form(None),
+    memory_mb: str = Form(None),
+    isolated_checkout: bool = Form(False),
     db: Session = Depends(get_db)
 ):
-    project_create = schema_project.ProjectCreate(
-        name=name,
-        source_type=source_type,
-        source_url=source_url if source_url else None,
-        source_path=source_path,
-        main_script=main_script,
-        arguments=arguments if arguments else None,
-        environment_type=environment_type
-    )
+    try:
+        project_create = schema_project.ProjectCreate(
+            name=name,
+            source_type=source_type,
+            source_url=source_url if source_url else None,
+            source_path=source_path,
+            main_script=main_script,
+            arguments=arguments if arguments else None,
+            environment_type=environment_type,
+            cache_enabled=cache_enabled,
+            cache_ttl_seconds=int(cache_ttl_seconds) if cache_ttl_seconds else None,
+            cache_inputs=cache_inputs if cache_inputs else None,
+            retry_max_attempts=int(retry_max_attempts) if retry_max_attempts else 0,
+            retry_backoff_seconds=int(retry_backoff_seconds) if retry_backoff_seconds else 30,
+            retry_backoff_max_seconds=int(retry_backoff_max_seconds) if retry_backoff_max_seconds else 3600,
+            retry_on=retry_on if retry_on else None,
+            retry_exit_codes=retry_exit_codes if retry_exit_codes else None,
+            execution_mode=execution_mode,
+            preload_modules=preload_modules if preload_modules else None,
+            artifact_paths=artifact_paths if artifact_paths else None,
+            priority=int(priority) if priority else 0,
+            cpu_weight=float(cpu_weight) if cpu_weight else None,
+            memory_mb=int(memory_mb) if memory_mb else None,
+            isolated_checkout=isolated_checkout
+        )
+    except ValueError as e: # Also pydantic's ValidationError
+        raise HTTPException(status_code=400, detail=f"Invalid project settings: {e}")
     crud_project.create_project(db=db, project=project_create)
     logger.info(f"Project '{name}' created.")
     return RedirectResponse(url="/", status_code=303)
@@ -113,24 +170,58 @@ async def update_project_from_form(
     main_script: str = Form(...),
     arguments: str = Form(None),
     environment_type: str = Form(...),
+    cache_enabled: bool = Form(False),
+    cache_ttl_seconds: str = Form(None),
+    cache_inputs: str = Form(None),
+    retry_max_attempts: str = Form(None),
+    retry_backoff_seconds: str = Form(None),
+    retry_backoff_max_seconds: str = Form(None),
+    retry_on: str = Form(None),
+    retry_exit_codes: str = Form(None),
+    execution_mode: str = Form("subprocess"),
+    preload_modules: str = Form(None),
+    artifact_paths: str = Form(None),
+    priority: str = Form(None),
+    cpu_weight: str = Form(None),
+    memory_mb: str = Form(None),
+    isolated_checkout: bool = Form(False),
     db: Session = Depends(get_db)
 ):
-    project_update = schema_project.ProjectCreate(
-        name=name,
-        source_type=source_type,
-        source_url=source_url if source_url else None,
-        source_path=source_path,
-        main_script=main_script,
-        arguments=arguments if arguments else None,
-        environment_type=environment_type
-    )
+    try:
+        project_update = schema_project.ProjectCreate(
+            name=name,
+            source_type=source_type,
+            source_url=source_url if source_url else None,
+            source_path=source_path,
+            main_script=main_script,
+            arguments=arguments if arguments else None,
+            environment_type=environment_type,
+            cache_enabled=cache_enabled,
+            cache_ttl_seconds=int(cache_ttl_seconds) if cache_ttl_seconds else None,
+            cache_inputs=cache_inputs if cache_inputs else None,
+            retry_max_attempts=int(retry_max_attempts) if retry_max_attempts else 0,
+            retry_backoff_seconds=int(retry_backoff_seconds) if retry_backoff_seconds else 30,
+            retry_backoff_max_seconds=int(retry_backoff_max_seconds) if retry_backoff_max_seconds else 3600,
+            retry_on=retry_on if retry_on else None,
+            retry_exit_codes=retry_exit_codes if retry_exit_codes else None,
+            execution_mode=execution_mode,
+            preload_modules=preload_modules if preload_modules else None,
+            artifact_paths=artifact_paths if artifact_paths else None,
+            priority=int(priority) if priority else 0,
+            cpu_weight=float(cpu_weight) if cpu_weight else None,
+            memory_mb=int(memory_mb) if memory_mb else None,
+            isolated_checkout=isolated_checkout
+        )
+    except ValueError as e: # Also pydantic's ValidationError
+        raise HTTPException(status_code=400, detail=f"Invalid project settings: {e}")
     crud_project.update_project(db=db, project_id=project_id, project=project_update)
     logger.info(f"Project ID {project_id} updated to '{name}'.")
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/projects/{project_id}/delete", response_class=RedirectResponse)
-async def delete_project_from_ui(request: Request, project_id: int, db: Session = Depends(get_db)):
+async def delete_project_from_ui(request: Request, project_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     schedules_to_delete = crud_schedule.get_schedules_by_project_id(db, project_id=project_id)
+    run_ids = crud_run.get_run_ids_by_project_id(db, project_id=project_id)
     
     db_project = crud_project.delete_project(db, project_id=project_id)
     if db_project is None:
@@ -144,7 +235,10 @@ async def delete_project_from_ui(request: Request, project_id: int, db: Session
             logger.info(f"Removed schedule ID {schedule.id} from scheduler due to project deletion.")
         except Exception as e:
             logger.error(f"Error removing job {schedule.id} from scheduler during project deletion: {e}")
-            
+
+    # The project's runs and artifact rows are gone; drop blobs no other run shares
+    background_tasks.add_task(delete_unreferenced_blobs, db)
+    background_tasks.add_task(delete_run_logs, run_ids)
     logger.info(f"Project ID {project_id} deleted.")
     return RedirectResponse(url="/", status_code=303)
 
@@ -179,6 +273,8 @@ async def create_schedule_from_form(
     run_days: List[str] = Form([]),
     run_time: str = Form(None),
     cron_schedule: str = Form(None),
+    retry_max_attempts: str = Form(None),
+    retry_backoff_seconds: str = Form(None),
     db: Session = Depends(get_db)
 ):
     final_cron_schedule = cron_schedule
@@ -189,15 +285,20 @@ async def create_schedule_from_form(
         days_of_week = ",".join(run_days)
         final_cron_schedule = f"{minute} {hour} * * {days_of_week}"
     
-    schedule_create = schema_schedule.ScheduleCreate(
-        name=name,
-        project_id=project_id,
-        cron_schedule=final_cron_schedule,
-        timezone=timezone,
-        schedule_type=schedule_type,
-        run_days=",".join(run_days) if run_days else None,
-        run_time=run_time
-    )
+    try:
+        schedule_create = schema_schedule.ScheduleCreate(
+            name=name,
+            project_id=project_id,
+            cron_schedule=final_cron_schedule,
+            timezone=timezone,
+            schedule_type=schedule_type,
+            run_days=",".join(run_days) if run_days else None,
+            run_time=run_time,
+            retry_max_attempts=int(retry_max_attempts) if retry_max_attempts else None,
+            retry_backoff_seconds=int(retry_backoff_seconds) if retry_backoff_seconds else None
+        )
+    except ValueError as e: # Also pydantic's ValidationError
+        raise HTTPException(status_code=400, detail=f"Invalid schedule settings: {e}")
     db_schedule = crud_schedule.create_schedule(db=db, schedule=schedule_create)
     
     scheduler: SchedulerService = request.app.state.scheduler
@@ -228,6 +329,8 @@ async def update_schedule_from_form(
     run_days: List[str] = Form([]),
     run_time: str = Form(None),
     cron_schedule: str = Form(None),
+    retry_max_attempts: str = Form(None),
+    retry_backoff_seconds: str = Form(None),
     db: Session = Depends(get_db)
 ):
     final_cron_schedule = cron_schedule
@@ -238,15 +341,20 @@ async def update_schedule_from_form(
         days_of_week = ",".join(run_days)
         final_cron_schedule = f"{minute} {hour} * * {days_of_week}"
 
-    schedule_update = schema_schedule.ScheduleCreate(
-        name=name,
-        project_id=project_id,
-        cron_schedule=final_cron_schedule,
-        timezone=timezone,
-        schedule_type=schedule_type,
-        run_days=",".join(run_days) if run_days else None,
-        run_time=run_time
-    )
+    try:
+        schedule_update = schema_schedule.ScheduleCreate(
+            name=name,
+            project_id=project_id,
+            cron_schedule=final_cron_schedule,
+            timezone=timezone,
+            schedule_type=schedule_type,
+            run_days=",".join(run_days) if run_days else None,
+            run_time=run_time,
+            retry_max_attempts=int(retry_max_attempts) if retry_max_attempts else None,
+            retry_backoff_seconds=int(retry_backoff_seconds) if retry_backoff_seconds else None
+        )
+    except ValueError as e: # Also pydantic's ValidationError
+        raise HTTPException(status_code=400, detail=f"Invalid schedule settings: {e}")
     db_schedule = crud_schedule.update_schedule(db, schedule_id=schedule_id, schedule=schedule_update)
     if db_schedule is None:
         logger.warning(f"Attempted to update non-existent schedule with ID: {schedule_id}")
@@ -280,7 +388,7 @@ async def delete_schedule_from_ui(request: Request, schedule_id: int, db: Sessio
     return RedirectResponse(url="/", status_code=303)
 
 @app.post("/schedules/{schedule_id}/run", response_class=RedirectResponse)
-async def run_schedule_now(schedule_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def run_schedule_now(schedule_id: int, background_tasks: BackgroundTasks, force: bool = False, db: Session = Depends(get_db)):
     schedule = crud_schedule.get_schedule(db, schedule_id=schedule_id)
     if schedule is None:
         logger.warning(f"Attempted to run non-existent schedule with ID: {schedule_id}")
@@ -288,7 +396,7 @@ async def run_schedule_now(schedule_id: int, background_tasks: BackgroundTasks,
     
     run_create = schema_run.RunCreate(project_id=schedule.project_id, schedule_id=schedule.id)
     db_run = crud_run.create_run(db=db, run=run_create)
-    background_tasks.add_task(execute_script, db, db_run.id)
+    background_tasks.add_task(execute_script, db, db_run.id, force)
     logger.info(f"Manually triggered run for schedule ID {schedule_id}. Run ID: {db_run.id}")
     return RedirectResponse(url=f"/runs/{db_run.id}", status_code=303)
 
@@ -323,10 +431,10 @@ async def project_detail(
     })
 
 @app.post("/projects/{project_id}/run", response_class=RedirectResponse)
-async def run_project_now(project_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def run_project_now(project_id: int, background_tasks: BackgroundTasks, force: bool = False, db: Session = Depends(get_db)):
     run_create = schema_run.RunCreate(project_id=project_id, schedule_id=None) # Explicitly set schedule_id to None
     db_run = crud_run.create_run(db=db, run=run_create)
-    background_tasks.add_task(execute_script, db, db_run.id)
+    background_tasks.add_task(execute_script, db, db_run.id, force)
     logger.info(f"Manually triggered run for project ID {project_id}. Run ID: {db_run.id}")
     return RedirectResponse(url=f"/runs/{db_run.id}", status_code=303)
 
@@ -343,6 +451,25 @@ async def run_scheduled_job(
     logger.info(f"Scheduled job triggered for project ID {project_id}, schedule ID {schedule_id}. Run ID: {db_run.id}")
     return RedirectResponse(url=f"/runs/{db_run.id}", status_code=303)
 
+@app.post("/runs/{run_id}/retry", response_class=RedirectResponse)
+async def retry_run(request: Request, run_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    previous_run = crud_run.get_run(db, run_id=run_id)
+    if previous_run is None:
+        logger.warning(f"Attempted to retry non-existent run with ID: {run_id}")
+        raise HTTPException(status_code=404, detail="Run not found")
+    if previous_run.status != "failed":
+        raise HTTPException(status_code=400, detail="Only failed runs can be retried")
+    # Held until the retry run is committed, so concurrent retries (e.g. from several instances) create one run
+    if crud_run.lock_run_for_retry(db, run_id=run_id) is None or crud_run.get_retry_of_run(db, run_id=run_id) is not None:
+        raise HTTPException(status_code=409, detail="Run has already been retried")
+
+    scheduler: SchedulerService = request.app.state.scheduler
+    scheduler.cancel_retry(run_id) # No-op when called by the scheduler itself
+    db_run = crud_run.create_retry_run(db, previous_run)
+    background_tasks.add_task(execute_script, db, db_run.id)
+    logger.info(f"Retry of run ID {run_id} triggered. Attempt {db_run.attempt}, Run ID: {db_run.id}")
+    return RedirectResponse(url=f"/runs/{db_run.id}", status_code=303)
+
 @app.get("/schedules/{schedule_id}", response_class=HTMLResponse)
 async def schedule_detail(request: Request, schedule_id: int, db: Session = Depends(get_db)):
     schedule = crud_schedule.get_schedule(db, schedule_id=schedule_id)
@@ -350,7 +477,8 @@ async def schedule_detail(request: Request, schedule_id: int, db: Session = Depe
         logger.warning(f"Attempted to view details of non-existent schedule with ID: {schedule_id}")
         raise HTTPException(status_code=404, detail="Schedule not found")
     logger.info(f"Schedule detail page accessed for schedule ID: {schedule_id}")
-    return templates.TemplateResponse("schedule_detail.html", {"request": request, "schedule": schedule})
+    stats = crud_run_stats.get_run_stats(db, "schedule", schedule_id)
+    return templates.TemplateResponse("schedule_detail.html", {"request": request, "schedule": schedule, "stats": stats})
 
 @app.get("/runs/{run_id}", response_class=HTMLResponse)
 async def run_detail(request: Request, run_id: int, db: Session = Depends(get_db)):
@@ -362,6 +490,14 @@ async def run_detail(request: Request, run_id: int, db: Session = Depends(get_db
     return templates.TemplateResponse("run_detail.html", {"request": request, "run": run})
 
 # Include the routers after the add routes
-app.include_router(projects.router)
-app.include_router(schedules.router)
-app.include_router(runs.router)
+# The HTML pages own /projects/{id}, /schedules/{id} and /runs/{id}, so the JSON API for these is served under /api.
+# The unprefixed mounts stay for existing clients of the list, create, update and delete endpoints.
+for router in (projects.router, schedules.router, runs.router):
+    app.include_router(router, prefix="/api")
+    app.include_router(router, include_in_schema=False)
+app.include_router(fleet.router)
+app.include_router(events.router)
+app.include_router(artifacts.router)
+app.include_router(admission.router)
+app.include_router(simulation.router)
+app.include_router(stats.router)
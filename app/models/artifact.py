@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database.base import Base
+
+class Artifact(Base):
+    __tablename__ = "artifacts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("runs.id"), index=True)
+    path = Column(String) # Relative to the project path
+    sha256 = Column(String, index=True) # Address of the blob in the artifact store
+    size = Column(Integer)
+    created_at = Column(DateTime, default=datetime.now)
+
+    run = relationship("Run", back_populates="artifacts")
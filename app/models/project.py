@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Boolean, Column, Float, Integer, String
 from sqlalchemy.orm import relationship
 from app.database.base import Base
 
@@ -13,6 +13,23 @@ class Project(Base):
     main_script = Column(String)
     arguments = Column(String, nullable=True)
     environment_type = Column(String)
+    cache_enabled = Column(Boolean, default=False) # Skip runs whose fingerprint matches the last successful run
+    cache_ttl_seconds = Column(Integer, nullable=True) # None means a cached result never expires
+    cache_inputs = Column(String, nullable=True) # Comma-separated input paths, relative to the project path
+    retry_max_attempts = Column(Integer, default=0) # Extra attempts after a failed run
+    retry_backoff_seconds = Column(Integer, default=30) # Base delay, doubled on every attempt
+    retry_backoff_max_seconds = Column(Integer, default=3600)
+    retry_on = Column(String, nullable=True) # Comma-separated retryable phases (git, sync, script); empty means all
+    retry_exit_codes = Column(String, nullable=True) # Comma-separated retryable script exit codes; empty means any
+    execution_mode = Column(String, default="subprocess") # subprocess or warm
+    preload_modules = Column(String, nullable=True) # Comma-separated modules imported once by warm workers
+    artifact_paths = Column(String, nullable=True) # Comma-separated glob patterns collected after each run
+    priority = Column(Integer, default=0) # Higher runs first when admission control queues runs
+    cpu_weight = Column(Float, nullable=True) # Declared cores per run; learned from past runs when empty
+    memory_mb = Column(Integer, nullable=True) # Declared memory per run; learned from past runs when empty
+    isolated_checkout = Column(Boolean, default=True) # GitHub projects: run each run in its own worktree of a shared clone
+    learned_cpu_weight = Column(Float, nullable=True)
+    learned_memory_mb = Column(Float, nullable=True)
 
     schedules = relationship("Schedule", back_populates="project", cascade="all, delete-orphan")
     runs = relationship("Run", back_populates="project", cascade="all, delete-orphan")
\ No newline at end of file
@@ -1,18 +1,41 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Boolean, Column, Float, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database.base import Base
 
 class Run(Base):
     __tablename__ = "runs"
+    __table_args__ = (
+        # Run listings are per project or schedule, newest first
+        Index("ix_runs_project_id_start_time", "project_id", "start_time"),
+        Index("ix_runs_schedule_id_start_time", "schedule_id", "start_time"),
+        Index("ix_runs_start_time", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"))
     schedule_id = Column(Integer, ForeignKey("schedules.id"), nullable=True)
-    start_time = Column(DateTime, default=datetime.now)
+    start_time = Column(DateTime, default=datetime.now) # When the run was created
+    started_at = Column(DateTime, nullable=True) # When execution began, after admission queueing
     end_time = Column(DateTime, nullable=True)
-    status = Column(String, default="pending") # pending, running, completed, failed
+    status = Column(String, default="pending", index=True) # pending, queued, running, completed, failed, skipped
+    instance_id = Column(Integer, nullable=True) # Instance that created or claimed the run, see app.core.instance
     log_output = Column(String, nullable=True)
+    fingerprint = Column(String, nullable=True, index=True)
+    cached_from_run_id = Column(Integer, ForeignKey("runs.id"), nullable=True) # Set when the run was skipped (cached)
+    attempt = Column(Integer, default=1)
+    retry_of_run_id = Column(Integer, ForeignKey("runs.id"), nullable=True, index=True) # Previous attempt of the same run
+    failure_phase = Column(String, nullable=True) # config, git, sync or script
+    exit_code = Column(Integer, nullable=True)
+    next_retry_at = Column(DateTime, nullable=True, index=True) # Set while a retry of this run is scheduled
+    peak_memory_mb = Column(Float, nullable=True)
+    cpu_seconds = Column(Float, nullable=True)
+    commit_sha = Column(String, nullable=True) # Commit a GitHub project's run executed
+    duration_zscore = Column(Float, nullable=True) # Deviation of the run's duration from its schedule's (or project's) baseline
+    duration_anomaly = Column(Boolean, default=False)
 
     project = relationship("Project", back_populates="runs")
-    schedule = relationship("Schedule", back_populates="runs")
\ No newline at end of file
+    schedule = relationship("Schedule", back_populates="runs")
+    cached_from = relationship("Run", remote_side=[id], foreign_keys=[cached_from_run_id])
+    retry_of = relationship("Run", remote_side=[id], foreign_keys=[retry_of_run_id])
+    artifacts = relationship("Artifact", back_populates="run", cascade="all, delete-orphan")
\ No newline at end of file
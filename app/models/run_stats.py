@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Float, Integer, String, Text, DateTime, UniqueConstraint
+from datetime import datetime
+import math
+from app.database.base import Base
+
+class RunStats(Base):
+    """Rolling statistics of one schedule's or project's runs, updated as each run finishes."""
+    __tablename__ = "run_stats"
+    __table_args__ = (UniqueConstraint("scope", "scope_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String) # schedule or project
+    scope_id = Column(Integer)
+    run_count = Column(Integer, default=0)
+    success_count = Column(Integer, default=0)
+    success_rate = Column(Float, nullable=True) # Exponentially weighted, so recent runs dominate
+    duration_samples = Column(Integer, default=0)
+    duration_log_mean = Column(Float, nullable=True) # Durations are skewed, so the baseline is kept in log space
+    duration_log_var = Column(Float, nullable=True)
+    duration_log_fast = Column(Float, nullable=True) # Faster-moving mean, compared with the baseline for the trend
+    duration_histogram = Column(Text, nullable=True) # JSON list of decayed counts per log-spaced bucket
+    duration_p50 = Column(Float, nullable=True)
+    duration_p95 = Column(Float, nullable=True)
+    output_size_fast = Column(Float, nullable=True)
+    output_size_slow = Column(Float, nullable=True)
+    anomaly_count = Column(Integer, default=0)
+    last_run_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    @property
+    def duration_mean(self) -> float | None:
+        return math.exp(self.duration_log_mean) if self.duration_log_mean is not None else None
+
+    @property
+    def duration_trend(self) -> float | None:
+        """Relative change of recent durations against the baseline, e.g. 0.2 when runs got 20% slower."""
+        if self.duration_log_fast is None or self.duration_log_mean is None:
+            return None
+        return math.exp(self.duration_log_fast - self.duration_log_mean) - 1
+
+    @property
+    def output_size(self) -> float | None:
+        return self.output_size_fast
+
+    @property
+    def output_size_trend(self) -> float | None:
+        if not self.output_size_slow:
+            return None
+        return self.output_size_fast / self.output_size_slow - 1
@@ -7,12 +7,14 @@ class Schedule(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
     cron_schedule = Column(String)
     timezone = Column(String, default="UTC")
     schedule_type = Column(String, default="cron") # cron or simple
     run_days = Column(String, nullable=True) # Comma-separated days, e.g., "MON,TUE,WED"
     run_time = Column(String, nullable=True) # HH:MM format, e.g., "10:00"
+    retry_max_attempts = Column(Integer, nullable=True) # Overrides the project's retry policy when set
+    retry_backoff_seconds = Column(Integer, nullable=True)
     
     project = relationship("Project", back_populates="schedules")
     runs = relationship("Run", back_populates="schedule", cascade="all, delete-orphan")
\ No newline at end of file
@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from app.services.admission import admission_controller
+
+router = APIRouter(
+    prefix="/admission",
+    tags=["admission"],
+)
+
+@router.get("/")
+def read_admission_status():
+    return admission_controller.snapshot()
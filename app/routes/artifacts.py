@@ -0,0 +1,110 @@
+import os
+import re
+import aiofiles
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.crud import artifact as crud_artifact
+from app.crud import run as crud_run
+from app.schemas import artifact as schema_artifact
+from app.database.base import SessionLocal
+from app.services import artifacts as artifact_store
+
+router = APIRouter(
+    prefix="/artifacts",
+    tags=["artifacts"],
+)
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+# Dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parses a single-range `Range` header into an inclusive (start, end) pair. Returns None for headers that are
+    to be ignored (malformed, other units, or several ranges) and raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
+        return None # Syntactically invalid, which RFC 7233 says to ignore
+    end = int(end) if end else size - 1
+    if start >= size:
+        raise ValueError("Range starts past the end of the content")
+    return start, min(end, size - 1)
+
+async def _read_blob(path: str, start: int, length: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(artifact_store.CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+@router.get("/", response_model=list[schema_artifact.Artifact])
+def read_artifacts(run_id: int, db: Session = Depends(get_db)):
+    return crud_artifact.get_artifacts_by_run_id(db, run_id=run_id)
+
+@router.post("/", response_model=schema_artifact.Artifact)
+async def upload_artifact(request: Request, run_id: int, path: str, db: Session = Depends(get_db)):
+    if crud_run.get_run(db, run_id=run_id) is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    sha256, size = await artifact_store.store_stream(request.stream())
+    artifact = schema_artifact.ArtifactCreate(run_id=run_id, path=path, sha256=sha256, size=size)
+    return crud_artifact.create_artifacts(db, [artifact])[0]
+
+@router.get("/{artifact_id}", response_model=schema_artifact.Artifact)
+def read_artifact(artifact_id: int, db: Session = Depends(get_db)):
+    db_artifact = crud_artifact.get_artifact(db, artifact_id=artifact_id)
+    if db_artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return db_artifact
+
+@router.get("/{artifact_id}/download")
+def download_artifact(request: Request, artifact_id: int, db: Session = Depends(get_db)):
+    db_artifact = crud_artifact.get_artifact(db, artifact_id=artifact_id)
+    if db_artifact is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    path = artifact_store.blob_path(db_artifact.sha256)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=410, detail="Artifact content is no longer available")
+
+    size = db_artifact.size
+    etag = f'"{db_artifact.sha256}"' # Content-addressed, so the hash is a strong validator
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f'attachment; filename="{os.path.basename(db_artifact.path).replace('"', '')}"',
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        byte_range = _parse_range(request.headers.get("range", ""), size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(_read_blob(path, start, end - start + 1), status_code=206, media_type="application/octet-stream", headers=headers)
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(_read_blob(path, 0, size), media_type="application/octet-stream", headers=headers)
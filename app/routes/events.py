@@ -0,0 +1,71 @@
+import asyncio
+import json
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.database.base import SessionLocal
+from app.crud import run as crud_run
+from app.services.events import event_bus, run_event
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"],
+)
+
+KEEPALIVE_SECONDS = 15
+
+def current_status_events(project_id: int | None, run_id: int | None) -> list[dict]:
+    """
+    Status of the runs a page is showing, sent first so a change between rendering the page
+    and subscribing isn't missed. For a project, that's its first page of runs.
+    """
+    db = SessionLocal()
+    try:
+        if run_id is not None:
+            run = crud_run.get_run(db, run_id)
+            runs = [run] if run and (project_id is None or run.project_id == project_id) else []
+        elif project_id is not None:
+            runs = crud_run.get_runs_by_project_id(db, project_id)
+        else:
+            runs = []
+        return [run_event(run, "status") for run in reversed(runs)]
+    finally:
+        db.close()
+
+@router.get("/runs")
+async def stream_run_events(request: Request, project_id: int | None = None, run_id: int | None = None):
+    """Server-Sent Events stream of run lifecycle events, optionally filtered to one project or run."""
+    # Subscribe before reading the current status, so nothing falls between the two
+    queue = event_bus.subscribe()
+    try:
+        initial_events = await run_in_threadpool(current_status_events, project_id, run_id)
+    except Exception:
+        event_bus.unsubscribe(queue)
+        raise
+
+    async def event_stream():
+        try:
+            yield "retry: 2000\n\n"
+            for event in initial_events:
+                yield f"event: run\ndata: {json.dumps(event)}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break # The server is shutting down
+                if project_id is not None and event["project_id"] != project_id:
+                    continue
+                if run_id is not None and event["run_id"] != run_id:
+                    continue
+                yield f"event: run\ndata: {json.dumps(event)}\n\n"
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
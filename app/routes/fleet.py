@@ -0,0 +1,98 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from app.crud import fleet as crud_fleet
+from app.schemas import fleet as schema_fleet
+from app.database.base import SessionLocal
+from app.services.scheduler import SchedulerService
+
+router = APIRouter(
+    prefix="/fleet",
+    tags=["fleet"],
+)
+
+YAML_MEDIA_TYPE = "application/yaml"
+
+# Dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _load_yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise HTTPException(status_code=415, detail="YAML support requires PyYAML (install the 'yaml' extra).")
+    return yaml
+
+def _parse_fleet(body: bytes, fmt: str) -> schema_fleet.Fleet:
+    try:
+        data = _load_yaml().safe_load(body) if fmt == "yaml" else json.loads(body)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse {fmt} document: {e}")
+    try:
+        return schema_fleet.Fleet.model_validate(data or {})
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+def _validate_fleet(fleet: schema_fleet.Fleet) -> list[str]:
+    """Collects every semantic error in the document, so a bad fleet file is reported in one pass."""
+    from apscheduler.triggers.cron import CronTrigger
+    errors = []
+    seen_projects = set()
+    for project in fleet.projects:
+        if project.name in seen_projects:
+            errors.append(f"Duplicate project name '{project.name}'.")
+        seen_projects.add(project.name)
+        if project.source_type == "GitHub" and not project.source_url:
+            errors.append(f"Project '{project.name}': GitHub projects require a source_url.")
+
+        seen_schedules = set()
+        for schedule in project.schedules:
+            if schedule.name in seen_schedules:
+                errors.append(f"Project '{project.name}': duplicate schedule name '{schedule.name}'.")
+            seen_schedules.add(schedule.name)
+            try:
+                CronTrigger.from_crontab(schedule.cron_schedule, timezone=schedule.timezone)
+            except Exception as e:
+                errors.append(f"Project '{project.name}', schedule '{schedule.name}': {e}")
+    return errors
+
+@router.get("/export", response_model=schema_fleet.Fleet)
+def export_fleet(format: str = "json", db: Session = Depends(get_db)):
+    fleet = crud_fleet.export_fleet(db)
+    if format == "yaml":
+        content = _load_yaml().safe_dump(fleet.model_dump(), sort_keys=False)
+        return Response(content=content, media_type=YAML_MEDIA_TYPE)
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'yaml'")
+    return fleet
+
+@router.post("/import", response_model=schema_fleet.FleetImportResult)
+async def import_fleet(request: Request, format: str | None = None, dry_run: bool = False, db: Session = Depends(get_db)):
+    fmt = format or ("yaml" if "yaml" in request.headers.get("content-type", "") else "json")
+    fleet = _parse_fleet(await request.body(), fmt)
+
+    errors = _validate_fleet(fleet)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    changes, schedules = await run_in_threadpool(crud_fleet.import_fleet, db, fleet, dry_run)
+    if schedules:
+        scheduler: SchedulerService = request.app.state.scheduler
+        await run_in_threadpool(scheduler.schedule_jobs, schedules)
+
+    return schema_fleet.FleetImportResult(
+        dry_run=dry_run,
+        created=sum(1 for change in changes if change.action == "create"),
+        updated=sum(1 for change in changes if change.action == "update"),
+        unchanged=sum(1 for change in changes if change.action == "unchanged"),
+        changes=changes,
+    )
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.crud import project as crud_project
 from app.schemas import project as schema_project
 from app.database.base import SessionLocal
 from app.services.scheduler import SchedulerService
 from app.crud import schedule as crud_schedule
+from app.crud import run as crud_run
+from app.services.artifacts import delete_unreferenced_blobs
+from app.core.logging_config import delete_run_logs
+from app.core.response_cache import cached_json_response, parse_fields, serialize
 
 router = APIRouter(
     prefix="/projects",
@@ -24,16 +28,24 @@ def create_project(project: schema_project.ProjectCreate, db: Session = Depends(
     return crud_project.create_project(db=db, project=project)
 
 @router.get("/", response_model=list[schema_project.Project])
-def read_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    projects = crud_project.get_projects(db, skip=skip, limit=limit)
-    return projects
+def read_projects(request: Request, skip: int = 0, limit: int = 100, fields: str | None = None, db: Session = Depends(get_db)):
+    selected = parse_fields(fields, schema_project.Project)
+
+    def build():
+        projects = crud_project.get_projects(db, skip=skip, limit=limit)
+        return serialize(projects, schema_project.Project, selected)
+    return cached_json_response(request, build)
 
 @router.get("/{project_id}", response_model=schema_project.Project)
-def read_project(project_id: int, db: Session = Depends(get_db)):
-    db_project = crud_project.get_project(db, project_id=project_id)
-    if db_project is None:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return db_project
+def read_project(request: Request, project_id: int, fields: str | None = None, db: Session = Depends(get_db)):
+    selected = parse_fields(fields, schema_project.Project)
+
+    def build():
+        db_project = crud_project.get_project(db, project_id=project_id)
+        if db_project is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return serialize(db_project, schema_project.Project, selected)
+    return cached_json_response(request, build)
 
 @router.put("/{project_id}", response_model=schema_project.Project)
 def update_project(project_id: int, project: schema_project.ProjectCreate, db: Session = Depends(get_db)):
@@ -43,9 +55,10 @@ def update_project(project_id: int, project: schema_project.ProjectCreate, db: S
     return db_project
 
 @router.delete("/{project_id}", response_model=schema_project.Project)
-def delete_project(request: Request, project_id: int, db: Session = Depends(get_db)):
+def delete_project(request: Request, project_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     # Get schedules associated with the project before deleting the project
     schedules_to_delete = crud_schedule.get_schedules_by_project_id(db, project_id=project_id)
+    run_ids = crud_run.get_run_ids_by_project_id(db, project_id=project_id)
     
     db_project = crud_project.delete_project(db, project_id=project_id)
     if db_project is None:
@@ -57,5 +70,7 @@ def delete_project(request: Request, project_id: int, db: Session = Depends(get_
             scheduler.remove_job(schedule.id)
         except Exception as e:
             print(f"Error removing job {schedule.id} from scheduler: {e}")
-            
+
+    background_tasks.add_task(delete_unreferenced_blobs, db)
+    background_tasks.add_task(delete_run_logs, run_ids)
     return db_project
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.crud import run as crud_run
 from app.schemas import run as schema_run
 from app.database.base import SessionLocal
+from app.core.response_cache import cached_json_response, parse_fields, serialize
 
 router = APIRouter(
     prefix="/runs",
@@ -21,17 +22,31 @@ def get_db():
 def create_run(run: schema_run.RunCreate, db: Session = Depends(get_db)):
     return crud_run.create_run(db=db, run=run)
 
-@router.get("/", response_model=list[schema_run.Run])
-def read_runs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    runs = crud_run.get_runs(db, skip=skip, limit=limit)
-    return runs
+@router.get("/", response_model=list[schema_run.RunSummary])
+def read_runs(request: Request, skip: int = 0, limit: int = 100, fields: str | None = None, view: str = "summary", db: Session = Depends(get_db)):
+    """Lists runs without their log output, unless `view=full` or `log_output` is among the selected `fields`."""
+    if view not in ("summary", "full"):
+        raise HTTPException(status_code=400, detail="view must be 'summary' or 'full'")
+    selected = parse_fields(fields, schema_run.Run)
+    include_log = view == "full" if selected is None else "log_output" in selected
+    # The summary schema never touches the deferred log column
+    schema = schema_run.Run if include_log else schema_run.RunSummary
+
+    def build():
+        runs = crud_run.get_runs(db, skip=skip, limit=limit, include_log=include_log)
+        return serialize(runs, schema, selected)
+    return cached_json_response(request, build)
 
 @router.get("/{run_id}", response_model=schema_run.Run)
-def read_run(run_id: int, db: Session = Depends(get_db)):
-    db_run = crud_run.get_run(db, run_id=run_id)
-    if db_run is None:
-        raise HTTPException(status_code=404, detail="Run not found")
-    return db_run
+def read_run(request: Request, run_id: int, fields: str | None = None, db: Session = Depends(get_db)):
+    selected = parse_fields(fields, schema_run.Run)
+
+    def build():
+        db_run = crud_run.get_run(db, run_id=run_id)
+        if db_run is None:
+            raise HTTPException(status_code=404, detail="Run not found")
+        return serialize(db_run, schema_run.Run, selected)
+    return cached_json_response(request, build)
 
 @router.put("/{run_id}", response_model=schema_run.Run)
 def update_run(run_id: int, status: str, log_output: str | None = None, db: Session = Depends(get_db)):
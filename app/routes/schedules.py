@@ -4,6 +4,7 @@ from app.crud import schedule as crud_schedule
 from app.schemas import schedule as schema_schedule
 from app.database.base import SessionLocal
 from app.services.scheduler import SchedulerService
+from app.core.response_cache import cached_json_response, parse_fields, serialize
 
 router = APIRouter(
     prefix="/schedules",
@@ -26,16 +27,24 @@ def create_schedule(request: Request, schedule: schema_schedule.ScheduleCreate,
     return db_schedule
 
 @router.get("/", response_model=list[schema_schedule.Schedule])
-def read_schedules(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    schedules = crud_schedule.get_schedules(db, skip=skip, limit=limit)
-    return schedules
+def read_schedules(request: Request, skip: int = 0, limit: int = 100, fields: str | None = None, db: Session = Depends(get_db)):
+    selected = parse_fields(fields, schema_schedule.Schedule)
+
+    def build():
+        schedules = crud_schedule.get_schedules(db, skip=skip, limit=limit)
+        return serialize(schedules, schema_schedule.Schedule, selected)
+    return cached_json_response(request, build)
 
 @router.get("/{schedule_id}", response_model=schema_schedule.Schedule)
-def read_schedule(schedule_id: int, db: Session = Depends(get_db)):
-    db_schedule = crud_schedule.get_schedule(db, schedule_id=schedule_id)
-    if db_schedule is None:
-        raise HTTPException(status_code=404, detail="Schedule not found")
-    return db_schedule
+def read_schedule(request: Request, schedule_id: int, fields: str | None = None, db: Session = Depends(get_db)):
+    selected = parse_fields(fields, schema_schedule.Schedule)
+
+    def build():
+        db_schedule = crud_schedule.get_schedule(db, schedule_id=schedule_id)
+        if db_schedule is None:
+            raise HTTPException(status_code=404, detail="Schedule not found")
+        return serialize(db_schedule, schema_schedule.Schedule, selected)
+    return cached_json_response(request, build)
 
 @router.put("/{schedule_id}", response_model=schema_schedule.Schedule)
 def update_schedule(request: Request, schedule_id: int, schedule: schema_schedule.ScheduleCreate, db: Session = Depends(get_db)):
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.schemas import simulation as schema_simulation
+from app.database.base import SessionLocal
+from app.services.simulator import run_simulation
+
+router = APIRouter(
+    prefix="/simulation",
+    tags=["simulation"],
+)
+
+# Dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.post("/", response_model=schema_simulation.SimulationReport)
+def simulate_schedules(request: schema_simulation.SimulationRequest, db: Session = Depends(get_db)):
+    """Replays the stored schedules, with the requested changes applied, without touching the live scheduler."""
+    return run_simulation(db, request)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.crud import run_stats as crud_run_stats
+from app.schemas import run_stats as schema_run_stats
+from app.database.base import SessionLocal
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+)
+
+# Dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/schedules", response_model=list[schema_run_stats.RunStats])
+def read_schedule_stats(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return crud_run_stats.get_run_stats_list(db, "schedule", skip=skip, limit=limit)
+
+@router.get("/schedules/{schedule_id}", response_model=schema_run_stats.RunStats)
+def read_schedule_stat(schedule_id: int, db: Session = Depends(get_db)):
+    db_stats = crud_run_stats.get_run_stats(db, "schedule", schedule_id)
+    if db_stats is None:
+        raise HTTPException(status_code=404, detail="No finished runs for this schedule yet")
+    return db_stats
+
+@router.get("/projects", response_model=list[schema_run_stats.RunStats])
+def read_project_stats(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return crud_run_stats.get_run_stats_list(db, "project", skip=skip, limit=limit)
+
+@router.get("/projects/{project_id}", response_model=schema_run_stats.RunStats)
+def read_project_stat(project_id: int, db: Session = Depends(get_db)):
+    db_stats = crud_run_stats.get_run_stats(db, "project", project_id)
+    if db_stats is None:
+        raise HTTPException(status_code=404, detail="No finished runs for this project yet")
+    return db_stats
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class ArtifactBase(BaseModel):
+    run_id: int
+    path: str
+    sha256: str
+    size: int
+
+class ArtifactCreate(ArtifactBase):
+    pass
+
+class Artifact(ArtifactBase):
+    id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,33 @@
+from typing import Any
+from pydantic import BaseModel, Field
+from app.schemas.project import ProjectCreate
+
+class FleetSchedule(BaseModel):
+    name: str
+    cron_schedule: str
+    timezone: str = "UTC"
+    schedule_type: str = "cron"
+    run_days: str | None = None
+    run_time: str | None = None
+    retry_max_attempts: int | None = Field(None, ge=0)
+    retry_backoff_seconds: int | None = Field(None, ge=0)
+
+class FleetProject(ProjectCreate):
+    schedules: list[FleetSchedule] = []
+
+class Fleet(BaseModel):
+    projects: list[FleetProject] = []
+
+class FleetChange(BaseModel):
+    kind: str # project or schedule
+    action: str # create, update or unchanged
+    project: str
+    schedule: str | None = None
+    changes: dict[str, list[Any]] = {} # field -> [old, new]
+
+class FleetImportResult(BaseModel):
+    dry_run: bool
+    created: int
+    updated: int
+    unchanged: int
+    changes: list[FleetChange]
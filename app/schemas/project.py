@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
+from app.services.retry import parse_exit_codes, parse_phases
 
 class ProjectBase(BaseModel):
     name: str
@@ -8,12 +9,43 @@ class ProjectBase(BaseModel):
     main_script: str
     arguments: str | None = None
     environment_type: str
+    cache_enabled: bool = False
+    cache_ttl_seconds: int | None = None
+    cache_inputs: str | None = None
+    retry_max_attempts: int = 0
+    retry_backoff_seconds: int = 30
+    retry_backoff_max_seconds: int = 3600
+    retry_on: str | None = None
+    retry_exit_codes: str | None = None
+    execution_mode: str = "subprocess"
+    preload_modules: str | None = None
+    artifact_paths: str | None = None
+    priority: int = 0
+    cpu_weight: float | None = None
+    memory_mb: int | None = None
+    isolated_checkout: bool = True
 
 class ProjectCreate(ProjectBase):
-    pass
+    retry_max_attempts: int = Field(0, ge=0)
+    retry_backoff_seconds: int = Field(30, ge=0)
+    retry_backoff_max_seconds: int = Field(3600, ge=0)
+
+    @field_validator("retry_on")
+    @classmethod
+    def _check_retry_on(cls, value: str | None) -> str | None:
+        parse_phases(value)
+        return value
+
+    @field_validator("retry_exit_codes")
+    @classmethod
+    def _check_retry_exit_codes(cls, value: str | None) -> str | None:
+        parse_exit_codes(value)
+        return value
 
 class Project(ProjectBase):
     id: int
+    learned_cpu_weight: float | None = None
+    learned_memory_mb: float | None = None
 
     class Config:
         from_attributes = True
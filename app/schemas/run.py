@@ -6,14 +6,38 @@ class RunBase(BaseModel):
     schedule_id: int | None = None
     status: str = "pending"
     log_output: str | None = None
+    fingerprint: str | None = None
+    cached_from_run_id: int | None = None
+    attempt: int = 1
+    retry_of_run_id: int | None = None
 
 class RunCreate(RunBase):
     pass
 
-class Run(RunBase):
+class RunSummary(BaseModel):
+    # Compact representation for listings, without the log body
     id: int
+    project_id: int
+    schedule_id: int | None = None
+    status: str
     start_time: datetime
+    started_at: datetime | None = None
     end_time: datetime | None = None
+    fingerprint: str | None = None
+    cached_from_run_id: int | None = None
+    attempt: int = 1
+    retry_of_run_id: int | None = None
+    failure_phase: str | None = None
+    exit_code: int | None = None
+    next_retry_at: datetime | None = None
+    peak_memory_mb: float | None = None
+    cpu_seconds: float | None = None
+    commit_sha: str | None = None
+    duration_zscore: float | None = None
+    duration_anomaly: bool | None = False
 
     class Config:
         from_attributes = True
+
+class Run(RunSummary):
+    log_output: str | None = None
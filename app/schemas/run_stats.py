@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class RunStats(BaseModel):
+    scope: str
+    scope_id: int
+    run_count: int
+    success_count: int
+    success_rate: float | None = None
+    duration_samples: int
+    duration_mean: float | None = None # Geometric mean, in seconds
+    duration_p50: float | None = None
+    duration_p95: float | None = None
+    duration_trend: float | None = None
+    output_size: float | None = None # Characters of log output
+    output_size_trend: float | None = None
+    anomaly_count: int
+    last_run_id: int | None = None
+    updated_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class ScheduleBase(BaseModel):
     name: str
@@ -8,9 +8,12 @@ class ScheduleBase(BaseModel):
     schedule_type: str = "cron"
     run_days: str | None = None
     run_time: str | None = None
+    retry_max_attempts: int | None = None
+    retry_backoff_seconds: int | None = None
 
 class ScheduleCreate(ScheduleBase):
-    pass
+    retry_max_attempts: int | None = Field(None, ge=0)
+    retry_backoff_seconds: int | None = Field(None, ge=0)
 
 class Schedule(ScheduleBase):
     id: int
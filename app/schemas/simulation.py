@@ -0,0 +1,47 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+class SimulationSchedule(BaseModel):
+    # Without an id the schedule is added; with the id of an existing schedule it replaces that schedule
+    id: int | None = None
+    project_id: int
+    name: str | None = None
+    cron_schedule: str
+    timezone: str = "UTC"
+
+class SimulationRequest(BaseModel):
+    start: datetime | None = None # Defaults to now
+    days: float = Field(30, gt=0, le=366)
+    schedules: list[SimulationSchedule] = []
+    remove_schedule_ids: list[int] = []
+    cpu_capacity: float | None = None # Defaults to the admission controller's capacity
+    memory_mb: float | None = None # Host memory available to runs; unlimited when not set
+    aging_seconds: float | None = None
+    duration_percentile: float = 50 # Which historical run duration to assume for each project
+    default_duration_seconds: float = 60 # For projects without completed runs
+    project_durations: dict[int, float] = {} # Overrides the historical duration per project
+    sla_seconds: dict[int, float] = {} # Per project; by default a run must finish before its schedule fires again
+
+class ProjectSimulationResult(BaseModel):
+    project_id: int
+    project_name: str | None = None
+    runs: int
+    duration_seconds: float
+    mean_queue_delay_seconds: float
+    p95_queue_delay_seconds: float
+    max_queue_delay_seconds: float
+    peak_concurrency: int
+    missed_slas: int
+
+class SimulationReport(BaseModel):
+    start: datetime
+    end: datetime
+    schedules: int
+    runs: int
+    peak_concurrency: int
+    mean_queue_delay_seconds: float
+    max_queue_delay_seconds: float
+    missed_slas: int
+    projects: list[ProjectSimulationResult]
+    invalid_schedules: dict[str, str] = {} # Schedule (id or name) -> error
+    elapsed_seconds: float
@@ -0,0 +1,205 @@
+import itertools
+import os
+import threading
+import time
+from typing import Callable
+from app.core.logging_config import get_logger
+
+logger = get_logger()
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+CPU_CAPACITY = float(os.getenv("ADMISSION_CPU_CAPACITY", str(os.cpu_count() or 1))) # Cores runs may use in total
+MEMORY_RESERVE_MB = float(os.getenv("ADMISSION_MEMORY_RESERVE_MB", "512")) # Memory always left free for the host
+AGING_SECONDS = float(os.getenv("ADMISSION_AGING_SECONDS", "60")) # Waiting this long is worth one priority level
+POLL_SECONDS = 2.0 # How often waiting runs re-check host load
+
+def read_total_memory_mb() -> float | None:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+# Memory runs may reserve in total, used when MemAvailable cannot be read (e.g. outside Linux)
+_total_memory_mb = read_total_memory_mb()
+MEMORY_CAPACITY_MB = float(os.getenv("ADMISSION_MEMORY_CAPACITY_MB", "0")) or (
+    _total_memory_mb - MEMORY_RESERVE_MB if _total_memory_mb else None
+)
+
+DEFAULT_CPU_WEIGHT = 1.0
+DEFAULT_MEMORY_MB = 256.0
+LEARNING_RATE = 0.3 # Weight of the latest run when updating learned weights
+
+def read_load_average() -> float | None:
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+def read_available_memory_mb() -> float | None:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def estimate_weights(project) -> tuple[float, float]:
+    """Returns (cpu cores, memory MB) for a run: declared weights first, then weights learned from past runs."""
+    cpu = project.cpu_weight or project.learned_cpu_weight or DEFAULT_CPU_WEIGHT
+    memory = project.memory_mb or project.learned_memory_mb or DEFAULT_MEMORY_MB
+    return cpu, memory
+
+def learn(previous: float | None, observed: float) -> float:
+    if previous is None:
+        return observed
+    return previous + LEARNING_RATE * (observed - previous)
+
+def effective_priority(priority: int, waited_seconds: float, aging_seconds: float = AGING_SECONDS) -> float:
+    """Priority grows with waiting time, so low-priority runs eventually reach the head of the queue."""
+    return priority + waited_seconds / aging_seconds
+
+def fits(cpu: float, memory_mb: float, reserved_cpu: float, reserved_memory_mb: float, running: int,
+         cpu_capacity: float = CPU_CAPACITY, load_average: float | None = None, available_memory_mb: float | None = None,
+         memory_capacity_mb: float | None = None) -> bool:
+    """
+    Decides whether a run with the given weights can start now. Shared with the schedule simulator.
+    Memory is checked against the host's available memory when it is known, otherwise against memory_capacity_mb
+    (no limit when neither is given).
+    """
+    if running == 0:
+        return True # An idle orchestrator always admits, so an oversized run cannot wait forever
+    # The load average also sees work started outside the orchestrator
+    busy = max(reserved_cpu, load_average) if load_average is not None else reserved_cpu
+    if busy + cpu > cpu_capacity:
+        return False
+    if available_memory_mb is not None:
+        # Runs admitted moments ago have not allocated their memory yet, so their reservations are not in MemAvailable
+        if memory_mb > available_memory_mb - reserved_memory_mb - MEMORY_RESERVE_MB:
+            return False
+    elif memory_capacity_mb is not None and reserved_memory_mb + memory_mb > memory_capacity_mb:
+        return False
+    return True
+
+class _Ticket:
+    def __init__(self, run_id: int, cpu: float, memory_mb: float, priority: int, sequence: int, resume: Callable[[], None]):
+        self.run_id = run_id
+        self.cpu = cpu
+        self.memory_mb = memory_mb
+        self.priority = priority
+        self.sequence = sequence
+        self.resume = resume
+        self.enqueued_at = time.monotonic()
+
+class AdmissionController:
+    """
+    Admits runs while they fit and queues the rest by effective priority. Queued runs do not hold a thread:
+    when capacity frees up (or host load drops, checked every POLL_SECONDS) they are started on a new thread
+    through their resume callback. Every admitted run must be released.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiting = []
+        self._running = {}
+        self._sequence = itertools.count()
+        self._poller = None
+
+    def _head(self, now: float) -> _Ticket:
+        return max(self._waiting, key=lambda t: (effective_priority(t.priority, now - t.enqueued_at), -t.sequence))
+
+    def _admit_waiting(self) -> list[_Ticket]:
+        """Moves runs from the head of the queue to running while they fit. Called with the lock held."""
+        admitted = []
+        now = time.monotonic()
+        load_average = read_load_average()
+        available_memory_mb = read_available_memory_mb()
+        while self._waiting:
+            ticket = self._head(now)
+            if not fits(
+                ticket.cpu,
+                ticket.memory_mb,
+                sum(t.cpu for t in self._running.values()),
+                sum(t.memory_mb for t in self._running.values()),
+                len(self._running),
+                load_average=load_average,
+                available_memory_mb=available_memory_mb,
+                memory_capacity_mb=MEMORY_CAPACITY_MB,
+            ):
+                break
+            self._waiting.remove(ticket)
+            self._running[ticket.run_id] = ticket
+            admitted.append(ticket)
+        if self._waiting and self._poller is None:
+            self._poller = threading.Thread(target=self._poll, name="admission-poller", daemon=True)
+            self._poller.start()
+        return admitted
+
+    def _start(self, tickets: list[_Ticket]):
+        for ticket in tickets:
+            logger.info(f"Run ID {ticket.run_id} admitted after {time.monotonic() - ticket.enqueued_at:.1f}s in the queue.")
+            threading.Thread(target=self._resume, args=(ticket,), name=f"run-{ticket.run_id}", daemon=True).start()
+
+    def _resume(self, ticket: _Ticket):
+        try:
+            ticket.resume()
+        except Exception as e:
+            logger.exception(f"Could not start queued Run ID {ticket.run_id}: {e}")
+            self.release(ticket.run_id)
+
+    def _poll(self):
+        # Host load and available memory change without any run finishing
+        while True:
+            time.sleep(POLL_SECONDS)
+            with self._lock:
+                admitted = self._admit_waiting()
+                if not self._waiting:
+                    self._poller = None
+            self._start(admitted)
+            if self._poller is None:
+                return
+
+    def try_admit(self, run_id: int, cpu: float, memory_mb: float, priority: int, resume: Callable[[], None]) -> bool:
+        """
+        Returns True when the run may start right away on the calling thread. Otherwise the run is queued
+        and resume() is later called on a new thread once it is admitted.
+        """
+        if not ADMISSION_CONTROL:
+            return True
+        ticket = _Ticket(run_id, min(cpu, CPU_CAPACITY), memory_mb, priority, next(self._sequence), resume)
+        with self._lock:
+            self._waiting.append(ticket)
+            admitted = self._admit_waiting()
+        # Higher-priority runs that fit as well
+        self._start([t for t in admitted if t is not ticket])
+        if ticket in admitted:
+            return True
+        logger.info(f"Run ID {run_id} queued by admission control (cpu={cpu:.2f}, memory={memory_mb:.0f}MB).")
+        return False
+
+    def release(self, run_id: int):
+        """Frees the run's capacity and starts the queued runs that now fit."""
+        if not ADMISSION_CONTROL:
+            return
+        with self._lock:
+            self._running.pop(run_id, None)
+            admitted = self._admit_waiting()
+        self._start(admitted)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "cpu_capacity": CPU_CAPACITY,
+                "memory_capacity_mb": MEMORY_CAPACITY_MB,
+                "load_average": read_load_average(),
+                "available_memory_mb": read_available_memory_mb(),
+                "running": [{"run_id": t.run_id, "cpu": t.cpu, "memory_mb": t.memory_mb} for t in self._running.values()],
+                "waiting": [
+                    {"run_id": t.run_id, "cpu": t.cpu, "memory_mb": t.memory_mb, "priority": t.priority,
+                     "effective_priority": effective_priority(t.priority, now - t.enqueued_at), "waited_seconds": now - t.enqueued_at}
+                    for t in self._waiting
+                ],
+            }
+
+admission_controller = AdmissionController()
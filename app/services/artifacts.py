@@ -0,0 +1,114 @@
+import glob
+import hashlib
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import AsyncIterator
+import aiofiles
+from sqlalchemy.orm import Session
+from app.crud import artifact as crud_artifact
+from app.schemas.artifact import ArtifactCreate
+from app.core.logging_config import get_logger
+
+logger = get_logger()
+
+ARTIFACT_STORE_DIR = os.getenv("ARTIFACT_STORE_DIR", "artifacts")
+CHUNK_SIZE = 1024 * 1024
+# Blobs younger than this are never garbage collected, so a blob stored moments before its row is committed survives
+GC_GRACE_SECONDS = 3600
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(ARTIFACT_STORE_DIR, "blobs", sha256[:2], sha256[2:])
+
+def _new_temp_file() -> tuple[int, str]:
+    tmp_dir = os.path.join(ARTIFACT_STORE_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    return tempfile.mkstemp(dir=tmp_dir)
+
+def _commit_blob(tmp_path: str, sha256: str):
+    """Moves a fully written temp file to its content address, or drops it if the blob already exists."""
+    destination = blob_path(sha256)
+    if os.path.exists(destination):
+        os.remove(tmp_path)
+        os.utime(destination) # Refresh the GC grace period
+        return
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(tmp_path, destination)
+
+def store_file(path: str) -> tuple[str, int]:
+    """Stores a file in the blob store and returns its (sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = _new_temp_file()
+    try:
+        with open(path, "rb") as source, os.fdopen(fd, "wb") as tmp:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+                tmp.write(chunk)
+        _commit_blob(tmp_path, digest.hexdigest())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest(), size
+
+async def store_stream(chunks: AsyncIterator[bytes]) -> tuple[str, int]:
+    """Streams an upload into the blob store without holding it in memory and returns its (sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = _new_temp_file()
+    os.close(fd)
+    try:
+        async with aiofiles.open(tmp_path, "wb") as tmp:
+            async for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                await tmp.write(chunk)
+        _commit_blob(tmp_path, digest.hexdigest())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest(), size
+
+def collect_artifacts(db: Session, run_id: int, project_path: str, patterns: str, since: datetime | None = None) -> list:
+    """
+    Stores every file matching the comma-separated glob patterns (relative to the project path) as an artifact of the run.
+    With `since`, only files modified at or after it are collected, so outputs left by earlier runs in a shared checkout are skipped.
+    """
+    paths = set()
+    for pattern in patterns.split(","):
+        pattern = pattern.strip()
+        if pattern:
+            paths.update(glob.glob(os.path.join(project_path, pattern), recursive=True))
+
+    artifacts = []
+    for path in sorted(paths):
+        if not os.path.isfile(path):
+            continue
+        if since is not None and os.path.getmtime(path) < since.timestamp():
+            continue
+        sha256, size = store_file(path)
+        artifacts.append(ArtifactCreate(run_id=run_id, path=os.path.relpath(path, project_path), sha256=sha256, size=size))
+    return crud_artifact.create_artifacts(db, artifacts)
+
+def delete_unreferenced_blobs(db: Session) -> int:
+    """Removes blobs no artifact points to any more, e.g. after their runs were deleted."""
+    blobs_dir = os.path.join(ARTIFACT_STORE_DIR, "blobs")
+    if not os.path.isdir(blobs_dir):
+        return 0
+    referenced = crud_artifact.get_referenced_hashes(db)
+    cutoff = time.time() - GC_GRACE_SECONDS
+    removed = 0
+    for prefix in os.listdir(blobs_dir):
+        prefix_dir = os.path.join(blobs_dir, prefix)
+        for name in os.listdir(prefix_dir):
+            path = os.path.join(prefix_dir, name)
+            if prefix + name not in referenced and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+    if removed:
+        logger.info(f"Removed {removed} unreferenced artifact blobs.")
+    return removed
@@ -0,0 +1,124 @@
+"""
+Isolated checkouts for GitHub projects.
+
+Every project keeps one shared clone at source_path/<repo_name>, which is only fetched and never run in. Each run gets its
+own `git worktree` under source_path/.worktrees/<repo_name>/run-<id>, pinned to the commit resolved when the run
+starts, so concurrent runs never see each other's updates. The environment is shared across runs and lives in the clone.
+"""
+import os
+import shutil
+import re
+import threading
+from sqlalchemy.orm import Session
+from app.crud import run as crud_run
+from app.models.project import Project
+from app.core.logging_config import get_logger
+
+logger = get_logger()
+
+WORKTREES_DIR = ".worktrees"
+WORKTREE_NAME_PATTERN = re.compile(r"run-(\d+)$")
+
+_locks = {}
+_locks_guard = threading.Lock()
+_active_worktrees = set()
+
+def lock_for(path: str) -> threading.Lock:
+    """Returns the process-wide lock for a repository or environment path."""
+    path = os.path.abspath(path)
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+def repository_name(project: Project) -> str:
+    return project.source_url.split("/")[-1].replace(".git", "")
+
+def repository_path(project: Project) -> str:
+    return os.path.join(project.source_path, repository_name(project))
+
+def environment_path(project: Project) -> str:
+    return os.path.join(repository_path(project), ".venv")
+
+def _worktrees_root(project: Project) -> str:
+    return os.path.join(project.source_path, WORKTREES_DIR, repository_name(project))
+
+def update_repository(project: Project) -> str:
+    """Clones or fetches the shared clone and returns the commit a new run should execute."""
+    import git
+    path = repository_path(project)
+    with lock_for(path):
+        if os.path.isdir(os.path.join(path, ".git")):
+            logger.info(f"Fetching updates for repository at {path}")
+            repo = git.Repo(path)
+            repo.remotes.origin.fetch()
+        else:
+            os.makedirs(path, exist_ok=True)
+            logger.info(f"Cloning repository from {project.source_url} to {path}")
+            repo = git.Repo.clone_from(project.source_url, path)
+        try:
+            # The fetched tip of the branch the clone tracks
+            return repo.git.rev_parse("@{upstream}")
+        except git.GitCommandError:
+            return repo.head.commit.hexsha
+
+def add_worktree(project: Project, run_id: int, commit_sha: str) -> str:
+    """Checks the commit out into a detached worktree for the run and returns its path."""
+    import git
+    path = os.path.join(_worktrees_root(project), f"run-{run_id}")
+    with lock_for(repository_path(project)):
+        if os.path.exists(path):
+            # Left over from an earlier attempt of the same run
+            _remove_worktree_locked(git.Repo(repository_path(project)), path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        git.Repo(repository_path(project)).git.worktree("add", "--detach", path, commit_sha)
+        _active_worktrees.add(os.path.abspath(path))
+    return path
+
+def _remove_worktree_locked(repo, path: str):
+    import git
+    if not os.path.exists(os.path.join(path, ".git")):
+        # Never finished being created, so git does not know it as a worktree
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    try:
+        repo.git.worktree("remove", "--force", path)
+    except git.GitCommandError as e:
+        logger.warning(f"git worktree remove failed for {path}, deleting it directly: {e}")
+        shutil.rmtree(path, ignore_errors=True)
+        repo.git.worktree("prune")
+
+def remove_worktree(project: Project, path: str):
+    import git
+    with lock_for(repository_path(project)):
+        _active_worktrees.discard(os.path.abspath(path))
+        _remove_worktree_locked(git.Repo(repository_path(project)), path)
+
+def cleanup_stale_worktrees(db: Session, projects: list[Project]) -> int:
+    """
+    Removes worktrees left behind by runs that are over, e.g. after a crash, and prunes git's bookkeeping for them.
+    Worktrees of runs still running in the database are kept, as they may belong to another instance sharing the clone.
+    """
+    import git
+    removed = 0
+    for project in projects:
+        if project.source_type != "GitHub" or not project.source_url:
+            continue
+        root = _worktrees_root(project)
+        repo_path = repository_path(project)
+        if not os.path.isdir(root) or not os.path.isdir(os.path.join(repo_path, ".git")):
+            continue
+        with lock_for(repo_path):
+            names = os.listdir(root)
+            # Read after listing: a run is claimed before its worktree is added, so every listed worktree in use shows as running
+            run_ids = {name: int(match.group(1)) for name in names if (match := WORKTREE_NAME_PATTERN.match(name))}
+            running = crud_run.get_running_run_ids(db, list(run_ids.values()))
+            repo = git.Repo(repo_path)
+            for name in names:
+                path = os.path.join(root, name)
+                if os.path.abspath(path) in _active_worktrees or run_ids.get(name) in running:
+                    continue
+                _remove_worktree_locked(repo, path)
+                removed += 1
+            repo.git.worktree("prune")
+    if removed:
+        logger.info(f"Removed {removed} stale worktrees.")
+    return removed
@@ -0,0 +1,93 @@
+import asyncio
+import signal
+import threading
+from datetime import datetime
+
+class EventBus:
+    """
+    In-process publish/subscribe for run lifecycle events.
+    Publishers can be on any thread (request handlers, executor threads, the scheduler);
+    each subscriber is an asyncio queue drained on its own event loop.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._max_queue_size = max_queue_size
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self._max_queue_size)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = {(loop, q) for loop, q in self._subscribers if q is not queue}
+
+    def publish(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; it will be dropped when it unsubscribes
+                pass
+
+    def close(self):
+        """Ends every open stream: each subscriber receives None in place of an event."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_close, queue)
+            except RuntimeError:
+                pass
+
+    def close_on_exit_signals(self):
+        """
+        Closes the bus as soon as the server is asked to exit. Servers such as uvicorn wait for
+        open responses to finish before running the lifespan shutdown, so a stream would hold that up.
+        Must be called from the main thread with the server's signal handlers already installed.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+            def handle_exit(signum, frame, previous=previous):
+                # Signal handlers can interrupt a publish holding the lock, so defer to the loop
+                loop.call_soon_threadsafe(self.close)
+                previous(signum, frame)
+            signal.signal(sig, handle_exit)
+
+def _offer(queue: asyncio.Queue, event: dict):
+    # A slow client loses events rather than slowing down publishers
+    if not queue.full():
+        queue.put_nowait(event)
+
+def _close(queue: asyncio.Queue):
+    # The end marker must get through even to a client that is behind
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+event_bus = EventBus()
+
+def run_event(run, event_type: str, **details) -> dict:
+    return {
+        "type": event_type, # status, queued, running, phase, completed, failed, skipped
+        "run_id": run.id,
+        "project_id": run.project_id,
+        "schedule_id": run.schedule_id,
+        "status": run.status,
+        "attempt": run.attempt,
+        "timestamp": datetime.now().isoformat(),
+        **details,
+    }
+
+def publish_run_event(run, event_type: str, **details):
+    event_bus.publish(run_event(run, event_type, **details))
@@ -1,13 +1,23 @@
 import subprocess
 from sqlalchemy.orm import Session
+from app.database.base import SessionLocal
 from app.crud import run as crud_run
+from app.crud import project as crud_project
 from app.models.project import Project
+from app.services import checkouts, run_cache
+from app.services.artifacts import collect_artifacts
+from app.services.events import publish_run_event
+from app.services.retry import RetryPolicy
+from app.services.scheduler import get_scheduler_service
+from app.services.worker_pool import worker_pool, WarmWorkerError, is_supported as warm_workers_supported
+from app.services.admission import admission_controller, estimate_weights
+from app.services.usage import run_and_measure
+import time
 import os
-import git # Import GitPython
-from app.core.logging_config import setup_logging # Import setup_logging
+from app.core.logging_config import get_logger, log_context
 import sys # Import sys to check platform
 
-logger = setup_logging()
+logger = get_logger()
 
 def _get_venv_exec_path(venv_path: str, executable_name: str) -> str:
     """Returns the path to an executable within a virtual environment, handling OS differences."""
@@ -16,13 +26,20 @@ def _get_venv_exec_path(venv_path: str, executable_name: str) -> str:
     else:
         return os.path.join(venv_path, "bin", executable_name)
 
-def sync_project_dependencies(project_path: str, environment_type: str):
+def sync_project_dependencies(project_path: str, environment_type: str, environment_path: str | None = None):
+    """Syncs the project's dependencies into environment_path, which defaults to the project's own .venv."""
     logger.info(f"Syncing dependencies for project at {project_path} using {environment_type}")
     if environment_type == "uv":
         logger.info(f"Running uv sync in {project_path}")
-        subprocess.run(["uv", "sync"], cwd=project_path, check=True)
+        if environment_path:
+            # A shared environment must not install the project itself: it would be an editable install pointing
+            # at this checkout, which may be a worktree that is removed after the run
+            env = {**os.environ, "UV_PROJECT_ENVIRONMENT": environment_path}
+            subprocess.run(["uv", "sync", "--no-install-project"], cwd=project_path, env=env, check=True)
+        else:
+            subprocess.run(["uv", "sync"], cwd=project_path, check=True)
     elif environment_type == "venv":
-        venv_path = os.path.join(project_path, ".venv")
+        venv_path = environment_path or os.path.join(project_path, ".venv")
         if not os.path.isdir(venv_path):
             logger.info(f"Creating venv at {venv_path}")
             # Use 'py' launcher on Windows, 'python' on other systems
@@ -39,15 +56,83 @@ def sync_project_dependencies(project_path: str, environment_type: str):
     else:
         raise ValueError(f"Unsupported environment type: {environment_type}")
 
-def execute_script(db: Session, run_id: int):
+def _sync_shared_environment(project_path: str, environment_type: str, environment_path: str) -> bool:
+    """
+    Syncs an environment shared by concurrent worktrees, one sync at a time, and only when the
+    environment files differ from the last sync. Returns whether a sync ran.
+    """
+    marker_path = os.path.join(environment_path, ".orchestrator-sync")
+    with checkouts.lock_for(environment_path):
+        # Versioned, so environments synced before the project was left uninstalled are synced again
+        fingerprint = "v2:" + run_cache.environment_fingerprint(project_path, environment_type)
+        if os.path.isfile(marker_path):
+            with open(marker_path) as f:
+                if f.read() == fingerprint:
+                    logger.info(f"Environment at {environment_path} is up to date, skipping sync.")
+                    return False
+        sync_project_dependencies(project_path, environment_type, environment_path)
+        with open(marker_path, "w") as f:
+            f.write(fingerprint)
+        return True
+
+def execute_script(db: Session, run_id: int, force: bool = False):
     db_run = crud_run.get_run(db, run_id)
     if not db_run:
         logger.warning(f"Run ID {run_id} not found for execution.")
         return
 
-    logger.info(f"Starting execution for Run ID: {run_id}, Project ID: {db_run.project_id}")
-    crud_run.update_run_status(db, run_id, "running")
+    with log_context(run_id=run_id, project_id=db_run.project_id):
+        _execute_run(db, db_run, force)
+
+def _import_paths(project_path: str) -> list[str]:
+    """The checkout's import roots, for runs whose environment does not have the project installed."""
+    paths = [project_path]
+    if os.path.isdir(os.path.join(project_path, "src")):
+        paths.append(os.path.join(project_path, "src"))
+    return paths
+
+def _run_script(project: Project, project_path: str, command: list[str], interpreter: list[str],
+                worker_path: str | None = None, import_paths: list[str] | None = None) -> tuple[int, str, str, float | None, float | None]:
+    """
+    Runs the main script in a warm worker when the project opts in, falling back to a fresh subprocess.
+    Warm workers are shared per worker_path (defaulting to project_path), so runs in separate worktrees reuse them.
+    import_paths are put first on the script's sys.path.
+    Returns (exit code, stdout, stderr, peak memory MB, CPU seconds); usage is None when it could not be measured.
+    """
+    if project.execution_mode == "warm" and warm_workers_supported():
+        args = project.arguments.split() if project.arguments else []
+        preload = [module.strip() for module in (project.preload_modules or "").split(",") if module.strip()]
+        try:
+            environment = run_cache.environment_fingerprint(project_path, project.environment_type)
+            return worker_pool.run(interpreter, worker_path or project_path, preload, project.main_script, args,
+                                   cwd=project_path, import_paths=import_paths, environment=environment)
+        except WarmWorkerError as e:
+            logger.warning(f"Warm worker unavailable, falling back to a subprocess: {e}")
 
+    env = None
+    if import_paths:
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(import_paths + [os.environ.get("PYTHONPATH", "")]).rstrip(os.pathsep)}
+    result, peak_memory_mb, cpu_seconds = run_and_measure(command, project_path, env)
+    return result.returncode, result.stdout, result.stderr, peak_memory_mb, cpu_seconds
+
+def _fail_run(db: Session, db_run, project: Project, log_output: str, phase: str, exit_code: int = None):
+    """Marks the run as failed and, if the retry policy allows it, schedules the next attempt through the scheduler."""
+    crud_run.record_failure(db, db_run.id, phase, exit_code, log_output)
+
+    policy = RetryPolicy.resolve(project, db_run.schedule)
+    if not policy.should_retry(db_run):
+        return
+    scheduler_service = get_scheduler_service()
+    if scheduler_service is None:
+        logger.warning(f"Run ID {db_run.id} is retryable but no scheduler is running; not retrying.")
+        return
+    retry_at = policy.next_retry_at(db_run.attempt or 1)
+    crud_run.set_next_retry_at(db, db_run.id, retry_at)
+    scheduler_service.schedule_retry(db_run.id, retry_at)
+    logger.info(f"Run ID {db_run.id} failed in phase '{phase}'; attempt {db_run.attempt + 1} scheduled at {retry_at}.")
+
+def _execute_run(db: Session, db_run, force: bool):
+    run_id = db_run.id
     project = db.query(Project).filter(Project.id == db_run.project_id).first()
     if not project:
         error_msg = f"Project not found for Run ID {run_id}."
@@ -55,38 +140,94 @@ def execute_script(db: Session, run_id: int):
         crud_run.update_run_status(db, run_id, "failed", error_msg)
         return
 
+    cpu_weight, memory_mb = estimate_weights(project)
+    resume = lambda: _resume_queued_run(run_id, force)
+    if not admission_controller.try_admit(run_id, cpu_weight, memory_mb, project.priority or 0, resume):
+        # Only a still-pending run is marked, in case it was admitted in the meantime
+        crud_run.mark_run_queued(db, run_id)
+        return
+    _run_admitted(db, db_run, project, force)
+
+def _run_admitted(db: Session, db_run, project: Project, force: bool):
+    run_id = db_run.id
+    try:
+        logger.info(f"Starting execution for Run ID: {run_id}, Project ID: {db_run.project_id}")
+        if not crud_run.claim_run(db, run_id):
+            logger.warning(f"Run ID {run_id} was already claimed; not executing it again.")
+            return
+        _run_project(db, db_run, project, force)
+    finally:
+        admission_controller.release(run_id)
+
+def _resume_queued_run(run_id: int, force: bool):
+    """Runs a run the admission controller queued, on the thread it was admitted on."""
+    db = SessionLocal()
+    try:
+        db_run = crud_run.get_run(db, run_id)
+        project = db.query(Project).filter(Project.id == db_run.project_id).first() if db_run else None
+        if project is None:
+            logger.warning(f"Queued Run ID {run_id} or its project no longer exists.")
+            admission_controller.release(run_id)
+            return
+        with log_context(run_id=run_id, project_id=db_run.project_id):
+            _run_admitted(db, db_run, project, force)
+    finally:
+        db.close()
+
+def _record_usage(db: Session, run_id: int, project: Project, peak_memory_mb: float | None, cpu_seconds: float | None, wall_seconds: float):
+    if peak_memory_mb is None or cpu_seconds is None:
+        return
+    crud_run.record_usage(db, run_id, peak_memory_mb, cpu_seconds)
+    crud_project.update_learned_weights(db, project.id, cpu_seconds / max(wall_seconds, 0.001), peak_memory_mb)
+
+def _run_project(db: Session, db_run, project: Project, force: bool):
+    import git # GitPython is slow to import, so it is loaded with the first run rather than at startup
+    run_id = db_run.id
+    phase = "config"
+    worktree_path = None
+    log_message = ""
     try:
         project_path = project.source_path
-        log_message = ""
 
         if project.source_type == "GitHub":
             if not project.source_url:
                 error_msg = "GitHub project requires a source_url."
                 logger.error(error_msg)
-                crud_run.update_run_status(db, run_id, "failed", error_msg)
+                _fail_run(db, db_run, project, error_msg, phase)
                 return
 
-            repo_name = project.source_url.split("/")[-1].replace(".git", "")
-            destination_path = os.path.join(project.source_path, repo_name)
-            logger.info(f"Handling GitHub project: {project.name}. Destination: {destination_path}")
-
-            # If the directory exists and is a git repo, pull.
-            if os.path.isdir(os.path.join(destination_path, '.git')):
-                logger.info(f"Pulling updates for repository at {destination_path}")
-                repo = git.Repo(destination_path)
-                origin = repo.remotes.origin
-                origin.pull()
-                log_message += f"Pulled updates for repository at {destination_path}\n"
-            # If the directory exists but is not a git repo, or doesn't exist, clone.
+            phase = "git"
+            publish_run_event(db_run, "phase", phase="git")
+            if project.isolated_checkout:
+                # Fetch into the shared clone, then run in a worktree pinned to the fetched commit
+                commit_sha = checkouts.update_repository(project)
+                crud_run.set_run_commit(db, run_id, commit_sha)
+                worktree_path = checkouts.add_worktree(project, run_id, commit_sha)
+                logger.info(f"Checked out {commit_sha} for Run ID {run_id} into {worktree_path}")
+                log_message += f"Checked out commit {commit_sha} into an isolated worktree\n"
+                project_path = worktree_path
             else:
-                if not os.path.exists(destination_path):
-                    os.makedirs(destination_path)
-                    logger.info(f"Created directory: {destination_path}")
-                logger.info(f"Cloning repository from {project.source_url} to {destination_path}")
-                git.Repo.clone_from(project.source_url, destination_path)
-                log_message += f"Cloned repository from {project.source_url} to {destination_path}\n"
-            
-            project_path = destination_path # Use the new destination_path for the rest of the script
+                destination_path = checkouts.repository_path(project)
+                logger.info(f"Handling GitHub project: {project.name}. Destination: {destination_path}")
+
+                # If the directory exists and is a git repo, pull.
+                if os.path.isdir(os.path.join(destination_path, '.git')):
+                    logger.info(f"Pulling updates for repository at {destination_path}")
+                    repo = git.Repo(destination_path)
+                    origin = repo.remotes.origin
+                    origin.pull()
+                    log_message += f"Pulled updates for repository at {destination_path}\n"
+                # If the directory exists but is not a git repo, or doesn't exist, clone.
+                else:
+                    if not os.path.exists(destination_path):
+                        os.makedirs(destination_path)
+                        logger.info(f"Created directory: {destination_path}")
+                    logger.info(f"Cloning repository from {project.source_url} to {destination_path}")
+                    repo = git.Repo.clone_from(project.source_url, destination_path)
+                    log_message += f"Cloned repository from {project.source_url} to {destination_path}\n"
+                crud_run.set_run_commit(db, run_id, repo.head.commit.hexsha)
+
+                project_path = destination_path # Use the new destination_path for the rest of the script
 
         elif project.source_type == "Local":
             logger.info(f"Using local project at {project_path}")
@@ -94,29 +235,52 @@ def execute_script(db: Session, run_id: int):
         else:
             error_msg = f"Unsupported source type: {project.source_type}"
             logger.error(error_msg)
-            crud_run.update_run_status(db, run_id, "failed", error_msg)
+            _fail_run(db, db_run, project, error_msg, phase)
             return
 
         if not os.path.isdir(project_path):
+            phase = "config"
             error_msg = f"Project path not found: {project_path}"
             logger.error(error_msg)
-            crud_run.update_run_status(db, run_id, "failed", error_msg)
+            _fail_run(db, db_run, project, error_msg, phase)
             return
 
-        sync_project_dependencies(project_path, project.environment_type)
+        if project.cache_enabled:
+            fingerprint = run_cache.compute_fingerprint(project, project_path)
+            cached_run = None if force else run_cache.find_cached_run(db, project, fingerprint)
+            if cached_run:
+                logger.info(f"Run ID {run_id} skipped: inputs unchanged since Run ID {cached_run.id}.")
+                log_message += f"Inputs unchanged since run {cached_run.id}; skipped (cached).\n"
+                crud_run.mark_run_cached(db, run_id, fingerprint, cached_run.id, log_message)
+                return
+            crud_run.set_run_fingerprint(db, run_id, fingerprint)
 
-        if project.environment_type == "uv":
-            command = ["uv", "run", project.main_script]
-        elif project.environment_type == "venv":
-            venv_path = os.path.join(project_path, ".venv")
-            python_executable = _get_venv_exec_path(venv_path, "python")
+        phase = "sync"
+        publish_run_event(db_run, "phase", phase="sync")
+        if worktree_path:
+            # Worktrees share the clone's environment and run its interpreter directly, since `uv run` would sync again
+            environment_path = checkouts.environment_path(project)
+            _sync_shared_environment(project_path, project.environment_type, environment_path)
+            python_executable = _get_venv_exec_path(environment_path, "python")
             command = [python_executable, project.main_script]
+            interpreter = [python_executable]
         else:
-            # This case is already handled in sync_project_dependencies, but as a safeguard:
-            error_msg = f"Unsupported environment type: {project.environment_type}"
-            logger.error(error_msg)
-            crud_run.update_run_status(db, run_id, "failed", error_msg)
-            return
+            sync_project_dependencies(project_path, project.environment_type)
+            if project.environment_type == "uv":
+                command = ["uv", "run", project.main_script]
+                interpreter = ["uv", "run", "python"]
+            elif project.environment_type == "venv":
+                venv_path = os.path.join(project_path, ".venv")
+                python_executable = _get_venv_exec_path(venv_path, "python")
+                command = [python_executable, project.main_script]
+                interpreter = [python_executable]
+            else:
+                # This case is already handled in sync_project_dependencies, but as a safeguard:
+                phase = "config"
+                error_msg = f"Unsupported environment type: {project.environment_type}"
+                logger.error(error_msg)
+                _fail_run(db, db_run, project, error_msg, phase)
+                return
 
         if project.arguments:
             command.extend(project.arguments.split())
@@ -124,25 +288,49 @@ def execute_script(db: Session, run_id: int):
         else:
             logger.info(f"Executing command: {' '.join(command)}")
 
-        result = subprocess.run(command, cwd=project_path, capture_output=True, text=True)
-        log_message += f"Script stdout:\n{result.stdout}\nScript stderr:\n{result.stderr}"
+        phase = "script"
+        publish_run_event(db_run, "phase", phase="script")
+        started = time.monotonic()
+        if worktree_path:
+            returncode, stdout, stderr, peak_memory_mb, cpu_seconds = _run_script(
+                project, project_path, command, interpreter, checkouts.repository_path(project), _import_paths(project_path)
+            )
+        else:
+            returncode, stdout, stderr, peak_memory_mb, cpu_seconds = _run_script(project, project_path, command, interpreter)
+        _record_usage(db, run_id, project, peak_memory_mb, cpu_seconds, time.monotonic() - started)
+        log_message += f"Script stdout:\n{stdout}\nScript stderr:\n{stderr}"
+
+        if project.artifact_paths:
+            try:
+                artifacts = collect_artifacts(db, run_id, project_path, project.artifact_paths, since=db_run.started_at)
+                log_message += f"\nCollected {len(artifacts)} artifacts."
+            except Exception as e:
+                logger.exception(f"Error collecting artifacts for Run ID {run_id}: {e}")
+                log_message += f"\nError collecting artifacts: {e}"
 
-        if result.returncode == 0:
+        if returncode == 0:
             logger.info(f"Run ID {run_id} completed successfully.")
             crud_run.update_run_status(db, run_id, "completed", log_message)
         else:
-            logger.error(f"Run ID {run_id} failed with exit code {result.returncode}.")
-            crud_run.update_run_status(db, run_id, "failed", log_message)
+            logger.error(f"Run ID {run_id} failed with exit code {returncode}.")
+            _fail_run(db, db_run, project, log_message, phase, returncode)
 
     except subprocess.CalledProcessError as e:
         error_msg = f"Subprocess failed for Run ID {run_id}: {e.stderr}"
         logger.error(error_msg)
-        crud_run.update_run_status(db, run_id, "failed", log_message + "\n" + error_msg)
+        _fail_run(db, db_run, project, log_message + "\n" + error_msg, phase)
     except git.InvalidGitRepositoryError as e:
         error_msg = f"Invalid Git repository for Run ID {run_id}: {e}"
         logger.error(error_msg)
-        crud_run.update_run_status(db, run_id, "failed", log_message + "\n" + error_msg)
+        _fail_run(db, db_run, project, log_message + "\n" + error_msg, phase)
     except Exception as e:
         error_msg = f"Unexpected error during execution for Run ID {run_id}: {e}"
-        logger.getLogger().exception(error_msg) # Use exception for full traceback
-        crud_run.update_run_status(db, run_id, "failed", log_message + "\n" + error_msg)
+        logger.exception(error_msg) # Use exception for full traceback
+        _fail_run(db, db_run, project, log_message + "\n" + error_msg, phase)
+    finally:
+        if worktree_path:
+            try:
+                checkouts.remove_worktree(project, worktree_path)
+            except Exception as e:
+                # Left for cleanup_stale_worktrees on the next start
+                logger.warning(f"Could not remove worktree {worktree_path}: {e}")
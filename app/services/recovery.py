@@ -0,0 +1,46 @@
+"""
+Recovery of runs left unfinished by orchestrator instances that stopped: the scheduler leader re-submits their
+pending and queued runs and marks their running runs as failed, since the processes executing them are gone.
+"""
+import threading
+from app.core import instance
+from app.crud import run as crud_run
+from app.database.base import SessionLocal
+from app.core.logging_config import get_logger
+
+logger = get_logger()
+
+INTERRUPTED_MESSAGE = "The orchestrator instance executing this run stopped before it finished."
+
+def recover_runs() -> int:
+    """Adopts the unfinished runs of instances that are gone and returns how many were recovered."""
+    db = SessionLocal()
+    resubmit = []
+    failed = 0
+    try:
+        for run in crud_run.get_orphaned_runs(db, instance.live_instance_ids(db.connection())):
+            run_id, status = run.id, run.status
+            if not crud_run.adopt_run(db, run_id, status, run.instance_id):
+                continue # Claimed or finished in the meantime
+            if status == "running":
+                logger.warning(f"Run ID {run_id} was interrupted by its instance stopping; marking it as failed.")
+                crud_run.update_run_status(db, run_id, "failed", INTERRUPTED_MESSAGE)
+                failed += 1
+            else:
+                logger.info(f"Re-submitting {status} Run ID {run_id} left behind by a stopped instance.")
+                resubmit.append(run_id)
+    finally:
+        db.close()
+    for run_id in resubmit:
+        threading.Thread(target=_execute, args=(run_id,), name=f"recovered-run-{run_id}", daemon=True).start()
+    if resubmit or failed:
+        logger.info(f"Recovered runs of stopped instances: {len(resubmit)} re-submitted, {failed} marked as failed.")
+    return len(resubmit) + failed
+
+def _execute(run_id: int):
+    from app.services.executor import execute_script # The executor imports the scheduler, which imports this module
+    db = SessionLocal()
+    try:
+        execute_script(db, run_id)
+    finally:
+        db.close()
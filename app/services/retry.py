@@ -0,0 +1,82 @@
+import random
+from datetime import datetime, timedelta
+from app.models.project import Project
+from app.models.run import Run
+from app.models.schedule import Schedule
+from app.core.logging_config import get_logger
+
+logger = get_logger()
+
+# Phases a failure can be attributed to. "config" failures (bad project settings) are never retried.
+RETRYABLE_PHASES = {"git", "sync", "script"}
+
+def _split(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+def parse_phases(value: str | None) -> set[str]:
+    """Parses a comma-separated retry_on setting; an empty set means every retryable phase."""
+    phases = set(_split(value))
+    unknown = phases - RETRYABLE_PHASES
+    if unknown:
+        raise ValueError(f"unknown failure phases {', '.join(sorted(unknown))}; use {', '.join(sorted(RETRYABLE_PHASES))}")
+    return phases
+
+def parse_exit_codes(value: str | None) -> set[int]:
+    """Parses a comma-separated retry_exit_codes setting; an empty set means every exit code."""
+    try:
+        return {int(code) for code in _split(value)}
+    except ValueError:
+        raise ValueError(f"exit codes must be comma-separated integers, got '{value}'") from None
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int, backoff_seconds: int, backoff_max_seconds: int, phases: set[str], exit_codes: set[int]):
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.phases = phases
+        self.exit_codes = exit_codes
+
+    @classmethod
+    def resolve(cls, project: Project, schedule: Schedule | None = None) -> "RetryPolicy":
+        """Builds the effective policy: the project's settings, with the schedule's overrides applied on top."""
+        max_attempts = project.retry_max_attempts or 0
+        backoff_seconds = project.retry_backoff_seconds if project.retry_backoff_seconds is not None else 30
+        if schedule is not None:
+            if schedule.retry_max_attempts is not None:
+                max_attempts = schedule.retry_max_attempts
+            if schedule.retry_backoff_seconds is not None:
+                backoff_seconds = schedule.retry_backoff_seconds
+        # Values saved before they were validated must not break the failure path, so bad ones are ignored
+        phases, exit_codes = set(), set()
+        try:
+            phases = parse_phases(project.retry_on)
+        except ValueError as e:
+            logger.warning(f"Ignoring retry_on of project ID {project.id}: {e}")
+        try:
+            exit_codes = parse_exit_codes(project.retry_exit_codes)
+        except ValueError as e:
+            logger.warning(f"Ignoring retry_exit_codes of project ID {project.id}: {e}")
+        return cls(
+            max_attempts=max(max_attempts, 0),
+            backoff_seconds=max(backoff_seconds, 0),
+            backoff_max_seconds=max(project.retry_backoff_max_seconds if project.retry_backoff_max_seconds is not None else 3600, 0),
+            phases=phases or RETRYABLE_PHASES,
+            exit_codes=exit_codes,
+        )
+
+    def should_retry(self, run: Run) -> bool:
+        if (run.attempt or 1) > self.max_attempts:
+            return False
+        if run.failure_phase not in self.phases & RETRYABLE_PHASES:
+            return False
+        if run.failure_phase == "script" and self.exit_codes:
+            return run.exit_code in self.exit_codes
+        return True
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter: a random delay between half and all of min(max, base * 2^(attempt-1))."""
+        ceiling = min(self.backoff_max_seconds, self.backoff_seconds * 2 ** (attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def next_retry_at(self, attempt: int) -> datetime:
+        return datetime.now() + timedelta(seconds=self.backoff_delay(attempt))
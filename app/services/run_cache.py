@@ -0,0 +1,100 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.crud import run as crud_run
+from app.models.project import Project
+
+# Files whose content defines the resolved environment of a project
+ENVIRONMENT_FILES = ["uv.lock", "pyproject.toml", "requirements.txt", ".python-version"]
+
+def _hash_file(path: str, digest) -> None:
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+# Never part of a project's sources
+SOURCE_EXCLUDED_DIRS = {".venv", ".git", "__pycache__", ".worktrees", "node_modules"}
+
+def _source_revision(project_path: str, main_script: str) -> str:
+    """
+    Returns the checked-out commit (plus a hash of uncommitted changes), or for non-git projects a hash of every
+    Python file in the project tree, so edits to imported helper modules count. Other files a script reads (data,
+    configuration) are only covered when they are listed in cache_inputs, as outputs written into the tree would
+    otherwise change the fingerprint on every run.
+    """
+    # In a worktree, .git is a file pointing at the main repository
+    if os.path.exists(os.path.join(project_path, ".git")):
+        import git
+        repo = git.Repo(project_path)
+        revision = repo.head.commit.hexsha
+        if repo.is_dirty(untracked_files=False):
+            revision += "+" + hashlib.sha256(repo.git.diff("HEAD").encode()).hexdigest()
+        return revision
+
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = sorted(d for d in dirs if d not in SOURCE_EXCLUDED_DIRS)
+        for name in sorted(files):
+            if name.endswith(".py"):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, project_path).encode())
+                _hash_file(file_path, digest)
+    script_path = os.path.join(project_path, main_script)
+    if not main_script.endswith(".py") and os.path.isfile(script_path):
+        _hash_file(script_path, digest)
+    return "tree:" + digest.hexdigest()
+
+def environment_fingerprint(project_path: str, environment_type: str) -> str:
+    digest = hashlib.sha256(environment_type.encode())
+    for name in ENVIRONMENT_FILES:
+        path = os.path.join(project_path, name)
+        if os.path.isfile(path):
+            digest.update(name.encode())
+            _hash_file(path, digest)
+    return digest.hexdigest()
+
+def _inputs_fingerprint(project_path: str, cache_inputs: str | None) -> str:
+    digest = hashlib.sha256()
+    for entry in (cache_inputs or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        path = os.path.join(project_path, entry)
+        digest.update(entry.encode())
+        if os.path.isfile(path):
+            _hash_file(path, digest)
+        elif os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    digest.update(os.path.relpath(file_path, path).encode())
+                    _hash_file(file_path, digest)
+        else:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+def compute_fingerprint(project: Project, project_path: str) -> str:
+    """Fingerprints everything that determines a run's result: source revision, arguments, environment and declared inputs."""
+    parts = [
+        _source_revision(project_path, project.main_script),
+        project.main_script,
+        project.arguments or "",
+        environment_fingerprint(project_path, project.environment_type),
+        _inputs_fingerprint(project_path, project.cache_inputs),
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+def find_cached_run(db: Session, project: Project, fingerprint: str):
+    """
+    Returns the project's last successful run if it had the same fingerprint and is still within the project's TTL.
+    An older run with the same fingerprint does not count, since a later run may have changed the outputs since.
+    """
+    cached_run = crud_run.get_last_successful_run(db, project.id)
+    if cached_run is None or cached_run.fingerprint != fingerprint:
+        return None
+    if project.cache_ttl_seconds is not None and cached_run.end_time is not None:
+        if datetime.now() - cached_run.end_time > timedelta(seconds=project.cache_ttl_seconds):
+            return None
+    return cached_run
@@ -0,0 +1,121 @@
+import json
+import math
+import os
+import threading
+from sqlalchemy.orm import Session
+from app.crud import run_stats as crud_run_stats
+from app.models.run import Run
+from app.models.run_stats import RunStats
+from app.core.logging_config import get_logger
+
+logger = get_logger()
+
+ANOMALY_ZSCORE = float(os.getenv("RUN_STATS_ANOMALY_ZSCORE", "3"))
+MIN_SAMPLES = int(os.getenv("RUN_STATS_MIN_SAMPLES", "10")) # Runs needed before a baseline is trusted
+BASELINE_ALPHA = 0.1 # Roughly the last 20 runs
+FAST_ALPHA = 0.3
+SLOW_ALPHA = 0.05
+HISTOGRAM_DECAY = 0.98 # Per run, so the percentiles follow roughly the last 50 runs
+MIN_LOG_STDDEV = 0.1 # Runs within about 10% of the baseline are never anomalous, however steady the schedule
+
+# Log-spaced duration buckets: bucket i starts at BUCKET_BASE * BUCKET_GROWTH ** i seconds (the last one reaches about 4 months)
+BUCKET_BASE = 0.01
+BUCKET_GROWTH = math.sqrt(2)
+BUCKET_COUNT = 60
+
+# Serialises the read-modify-write of aggregate rows between executor threads
+lock = threading.Lock()
+
+def _ewma(previous: float | None, value: float, alpha: float, samples: int) -> float:
+    if previous is None:
+        return value
+    # Plain averaging until there are enough samples for the configured alpha
+    alpha = max(alpha, 1 / samples)
+    return previous + alpha * (value - previous)
+
+def _bucket(duration: float) -> int:
+    index = math.floor(math.log(max(duration, BUCKET_BASE) / BUCKET_BASE, BUCKET_GROWTH))
+    return min(max(index, 0), BUCKET_COUNT - 1)
+
+def histogram_percentile(histogram: list[float], percentile: float) -> float | None:
+    total = sum(histogram)
+    if total <= 0:
+        return None
+    target = percentile / 100 * total
+    cumulative = 0.0
+    for index, count in enumerate(histogram):
+        if count > 0 and cumulative + count >= target:
+            # Interpolate geometrically inside the bucket
+            return BUCKET_BASE * BUCKET_GROWTH ** (index + (target - cumulative) / count)
+        cumulative += count
+    return BUCKET_BASE * BUCKET_GROWTH ** BUCKET_COUNT
+
+def duration_zscore(stats: RunStats, duration: float) -> float | None:
+    """Deviation of a duration from the baseline in (log-space) standard deviations, or None while the baseline is too young."""
+    if stats.duration_samples < MIN_SAMPLES or stats.duration_log_mean is None:
+        return None
+    stddev = max(math.sqrt(stats.duration_log_var or 0.0), MIN_LOG_STDDEV)
+    return (math.log(max(duration, BUCKET_BASE)) - stats.duration_log_mean) / stddev
+
+def update_stats(stats: RunStats, run_id: int, succeeded: bool, duration: float | None, output_size: int | None) -> float | None:
+    """Folds one finished run into the aggregate in O(1) and returns the run's duration z-score against the previous baseline."""
+    stats.run_count += 1
+    stats.success_rate = _ewma(stats.success_rate, 1.0 if succeeded else 0.0, BASELINE_ALPHA, stats.run_count)
+    if succeeded:
+        stats.success_count += 1
+    stats.last_run_id = run_id
+
+    zscore = None
+    if duration is not None:
+        zscore = duration_zscore(stats, duration)
+        if zscore is not None and abs(zscore) >= ANOMALY_ZSCORE:
+            stats.anomaly_count += 1
+
+        stats.duration_samples += 1
+        log_duration = math.log(max(duration, BUCKET_BASE))
+        if stats.duration_log_mean is None:
+            stats.duration_log_mean, stats.duration_log_var = log_duration, 0.0
+        else:
+            # Incremental exponentially weighted mean and variance
+            alpha = max(BASELINE_ALPHA, 1 / stats.duration_samples)
+            diff = log_duration - stats.duration_log_mean
+            stats.duration_log_mean += alpha * diff
+            stats.duration_log_var = (1 - alpha) * (stats.duration_log_var + alpha * diff * diff)
+        stats.duration_log_fast = _ewma(stats.duration_log_fast, log_duration, FAST_ALPHA, stats.duration_samples)
+
+        histogram = json.loads(stats.duration_histogram) if stats.duration_histogram else [0.0] * BUCKET_COUNT
+        histogram = [count * HISTOGRAM_DECAY for count in histogram]
+        histogram[_bucket(duration)] += 1
+        stats.duration_histogram = json.dumps([round(count, 4) for count in histogram])
+        stats.duration_p50 = histogram_percentile(histogram, 50)
+        stats.duration_p95 = histogram_percentile(histogram, 95)
+
+    if output_size is not None:
+        stats.output_size_fast = _ewma(stats.output_size_fast, output_size, FAST_ALPHA, stats.run_count)
+        stats.output_size_slow = _ewma(stats.output_size_slow, output_size, SLOW_ALPHA, stats.run_count)
+    return zscore
+
+def record_run(db: Session, db_run: Run):
+    """
+    Updates the schedule and project aggregates with a finished run and flags the run if its duration is anomalous.
+    Only adds changes to the session; the caller commits them together with the run, while holding `lock`.
+    """
+    succeeded = db_run.status == "completed"
+    # Durations and output sizes of failed runs say more about the failure than about the workload
+    # Measured from when execution began, so admission queueing does not count as the run getting slower
+    started = db_run.started_at or db_run.start_time
+    duration = (db_run.end_time - started).total_seconds() if succeeded and db_run.end_time else None
+    output_size = len(db_run.log_output or "") if succeeded else None
+
+    scopes = [("project", db_run.project_id)]
+    if db_run.schedule_id is not None:
+        scopes.append(("schedule", db_run.schedule_id))
+    for scope, scope_id in scopes:
+        stats = crud_run_stats.get_or_create_run_stats(db, scope, scope_id)
+        zscore = update_stats(stats, db_run.id, succeeded, duration, output_size)
+        # A schedule's own history is the better baseline; manual runs fall back to the project's
+        if scope == scopes[-1][0]:
+            db_run.duration_zscore = zscore
+            db_run.duration_anomaly = zscore is not None and abs(zscore) >= ANOMALY_ZSCORE
+            if db_run.duration_anomaly:
+                logger.warning(f"Run ID {db_run.id} took {duration:.1f}s, {zscore:+.1f} standard deviations from the {scope} baseline.")
@@ -1,36 +1,78 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+# APScheduler and httpx are imported where they are used, so importing this module stays cheap
+from datetime import datetime
+import threading
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from app.crud import run as crud_run
+from app.crud import schedule as crud_schedule
+from app.database.base import SessionLocal
 from app.schemas import run as schema_run
-import httpx
+from app.services.recovery import recover_runs
 import os
-from dotenv import load_dotenv
-from app.core.logging_config import setup_logging # Import setup_logging
+from app.core import config # Loads .env before FASTAPI_BASE_URL is read
+from app.core.logging_config import get_logger
 
-logger = setup_logging()
-load_dotenv() # Load environment variables from .env file
+logger = get_logger()
 
 FASTAPI_BASE_URL = os.getenv("FASTAPI_BASE_URL", "http://localhost:8000")
+SCHEDULER_LOCK_KEY = 7_364_813 # PostgreSQL advisory lock held by the one instance whose scheduler fires jobs
+LEADER_POLL_SECONDS = float(os.getenv("SCHEDULER_LEADER_POLL_SECONDS", "15"))
+SYNC_SECONDS = float(os.getenv("SCHEDULER_SYNC_SECONDS", "30"))
+
+_current_service = None
+
+def get_scheduler_service():
+    """Returns the running SchedulerService, or None if the scheduler has not been started."""
+    return _current_service
 
 class SchedulerService:
+    """
+    Fires cron schedules and retries. When several instances share a PostgreSQL database, only the one holding
+    the scheduler advisory lock (on a dedicated connection) runs its scheduler; the others stand by and take over
+    once that connection is gone. The running scheduler regularly syncs its jobs with the database, so schedules
+    and retries created, changed or deleted through any instance are picked up.
+    """
     def __init__(self, db: Session):
+        from apscheduler.schedulers.background import BackgroundScheduler
         self.scheduler = BackgroundScheduler()
         self.db = db
+        self.engine = db.get_bind()
+        self.leading = False
+        self._registered = {} # schedule id -> (project id, cron, timezone) of the registered job
+        self._lock_connection = None
+        self._stopped = threading.Event()
 
-    def schedule_job(self, schedule_id: int, project_id: int, cron_schedule: str, timezone: str = "UTC"):
+    def schedule_job(self, schedule_id: int, project_id: int, cron_schedule: str, timezone: str = "UTC", replace_existing: bool = False):
+        from apscheduler.triggers.cron import CronTrigger
+        self._registered[schedule_id] = (project_id, cron_schedule, timezone) # Also when invalid, so syncing does not retry it
         try:
             self.scheduler.add_job(
                 self.run_job,
                 CronTrigger.from_crontab(cron_schedule, timezone=timezone),
                 id=str(schedule_id),
                 args=[project_id, schedule_id],
+                replace_existing=replace_existing,
             )
             logger.info(f"Scheduled job ID {schedule_id} for project {project_id} with cron: {cron_schedule} in timezone {timezone}")
         except Exception as e:
             logger.error(f"Error scheduling job ID {schedule_id} for project {project_id} with cron {cron_schedule} in timezone {timezone}: {e}")
 
+    def schedule_jobs(self, schedules):
+        """Registers (or replaces) many schedules while the scheduler is paused, so it only wakes up once."""
+        from apscheduler.schedulers.base import STATE_RUNNING
+        was_running = self.scheduler.state == STATE_RUNNING
+        if was_running:
+            self.scheduler.pause()
+        try:
+            for schedule in schedules:
+                self.schedule_job(schedule.id, schedule.project_id, schedule.cron_schedule, schedule.timezone, replace_existing=True)
+        finally:
+            if was_running:
+                self.scheduler.resume()
+        logger.info(f"Registered {len(schedules)} jobs in one batch.")
+
     def remove_job(self, schedule_id: int):
+        self._registered.pop(schedule_id, None)
         try:
             self.scheduler.remove_job(str(schedule_id))
             logger.info(f"Removed job ID {schedule_id} from scheduler.")
@@ -38,6 +80,7 @@ class SchedulerService:
             logger.error(f"Error removing job ID {schedule_id} from scheduler: {e}")
 
     def run_job(self, project_id: int, schedule_id: int):
+        import httpx
         logger.info(f"Scheduler triggering run for project {project_id}, schedule {schedule_id}.")
         try:
             with httpx.Client() as client:
@@ -52,10 +95,144 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Unexpected error when triggering run for project {project_id}, schedule {schedule_id}: {e}")
 
-    def start(self):
-        self.scheduler.start()
+    def schedule_retry(self, run_id: int, run_at: datetime):
+        from apscheduler.triggers.date import DateTrigger
+        self.scheduler.add_job(
+            self.retry_run,
+            DateTrigger(run_date=run_at),
+            id=f"retry-{run_id}",
+            args=[run_id],
+            replace_existing=True,
+            misfire_grace_time=None, # A late retry is still better than none
+        )
+        logger.info(f"Scheduled retry of run {run_id} at {run_at}.")
+
+    def cancel_retry(self, run_id: int):
+        job_id = f"retry-{run_id}"
+        if self.scheduler.get_job(job_id):
+            self.scheduler.remove_job(job_id)
+            logger.info(f"Cancelled scheduled retry of run {run_id}.")
+
+    def retry_run(self, run_id: int):
+        import httpx
+        logger.info(f"Scheduler triggering retry of run {run_id}.")
+        try:
+            with httpx.Client() as client:
+                response = client.post(f"{FASTAPI_BASE_URL}/runs/{run_id}/retry")
+                response.raise_for_status()
+            logger.info(f"Successfully triggered retry of run {run_id} via API. Response: {response.status_code}")
+        except httpx.RequestError as e:
+            logger.error(f"HTTPX Request Error when retrying run {run_id}: {e}")
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP Status Error when retrying run {run_id}: {e.response.status_code} - {e.response.text}")
+        except Exception as e:
+            logger.error(f"Unexpected error when retrying run {run_id}: {e}")
+
+    def sync_jobs(self):
+        """
+        Registers schedules and pending retries found in the database, and removes jobs of deleted schedules.
+        Also recovers the unfinished runs of instances that stopped, including this one before a restart.
+        """
+        if not self._holds_lock():
+            self._step_down()
+            return
+        db = SessionLocal()
+        try:
+            schedules = crud_schedule.get_schedules(db, limit=None) # Every schedule, not just the first page
+            runs_awaiting_retry = crud_run.get_runs_awaiting_retry(db)
+        finally:
+            db.close()
+        changed = [schedule for schedule in schedules if self._registered.get(schedule.id) != (schedule.project_id, schedule.cron_schedule, schedule.timezone)]
+        if changed:
+            self.schedule_jobs(changed)
+        for schedule_id in set(self._registered) - {schedule.id for schedule in schedules}:
+            self.remove_job(schedule_id)
+        # Retries only live in memory in the scheduler, so re-arm the ones pending before a restart or set by other instances
+        for run in runs_awaiting_retry:
+            if self.scheduler.get_job(f"retry-{run.id}") is None:
+                self.schedule_retry(run.id, max(run.next_retry_at, datetime.now()))
+        try:
+            recover_runs()
+        except Exception as e:
+            logger.error(f"Could not recover runs of stopped instances: {e}")
+
+    def _try_lead(self) -> bool:
+        if self.engine.dialect.name != "postgresql":
+            return True # Other backends are served by a single instance
+        connection = self.engine.connect()
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SCHEDULER_LOCK_KEY}).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._lock_connection = connection # The lock lasts as long as this session
+        return True
+
+    def _holds_lock(self) -> bool:
+        if self._lock_connection is None:
+            return True
+        try:
+            self._lock_connection.execute(text("SELECT 1"))
+            self._lock_connection.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Lost the connection holding the scheduler lock: {e}")
+            return False
+
+    def _lead(self):
+        from apscheduler.schedulers.base import STATE_PAUSED
+        self.leading = True
+        self.sync_jobs()
+        self.scheduler.add_job(self.sync_jobs, "interval", seconds=SYNC_SECONDS, id="sync-jobs", replace_existing=True)
+        if self.scheduler.state == STATE_PAUSED:
+            self.scheduler.resume()
+        else:
+            self.scheduler.start()
         logger.info("Scheduler started.")
 
+    def _step_down(self):
+        from apscheduler.schedulers.base import STATE_RUNNING
+        self.leading = False
+        if self.scheduler.state == STATE_RUNNING:
+            self.scheduler.pause()
+        if self._lock_connection is not None:
+            self._lock_connection.invalidate() # Never back to the pool, its session may still hold the lock
+            self._lock_connection = None
+        logger.warning("Scheduler paused until this instance holds the scheduler lock again.")
+        self._wait_for_leadership()
+
+    def _wait_for_leadership(self):
+        def wait():
+            while not self._stopped.wait(LEADER_POLL_SECONDS):
+                try:
+                    if self._try_lead():
+                        self._lead()
+                        return
+                except Exception as e:
+                    logger.warning(f"Could not check the scheduler lock: {e}")
+        threading.Thread(target=wait, name="scheduler-election", daemon=True).start()
+
+    def start(self):
+        global _current_service
+        _current_service = self
+        if self._try_lead():
+            self._lead()
+        else:
+            logger.info("Another instance runs the scheduler; standing by.")
+            self._wait_for_leadership()
+
     def shutdown(self):
-        self.scheduler.shutdown()
+        global _current_service
+        from apscheduler.schedulers.base import STATE_STOPPED
+        self._stopped.set()
+        if self.scheduler.state != STATE_STOPPED:
+            self.scheduler.shutdown()
+        if self._lock_connection is not None:
+            self._lock_connection.close() # Releases the lock, so a standby instance takes over
+            self._lock_connection = None
+        _current_service = None
         logger.info("Scheduler shutdown.")
\ No newline at end of file
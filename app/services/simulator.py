@@ -0,0 +1,249 @@
+"""
+Offline replay of schedules in virtual time, for capacity planning.
+
+Every schedule's cron fire times in the window become runs that pass through the same admission rules as
+live runs (`admission.fits` with priority aging). Each run lasts its project's historical duration. Caching, warm workers and
+retries are not modelled.
+"""
+import heapq
+import itertools
+import math
+import time
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from app.crud import project as crud_project
+from app.crud import run as crud_run
+from app.crud import schedule as crud_schedule
+from app.schemas.simulation import SimulationRequest, SimulationReport, ProjectSimulationResult
+from app.services.admission import fits, estimate_weights, CPU_CAPACITY, AGING_SECONDS
+from app.core.logging_config import get_logger
+
+logger = get_logger()
+
+DATE_FIELDS = ("year", "month", "day", "week", "day_of_week")
+
+def _matches(field, dateval: datetime) -> bool:
+    return field.get_next_value(dateval) == field.get_value(dateval)
+
+def _matching_days(date_fields: list, first_day: date, last_day: date, cache: dict) -> list[datetime]:
+    """Local midnights of the days the date fields match. Cached, as crons often differ only in their time of day."""
+    key = (tuple(str(field) for field in date_fields), first_day, last_day)
+    days = cache.get(key)
+    if days is None:
+        days = []
+        day = first_day
+        while day <= last_day:
+            local = datetime(day.year, day.month, day.day)
+            if all(_matches(field, local) for field in date_fields):
+                days.append(local)
+            day += timedelta(days=1)
+        cache[key] = days
+    return days
+
+def cron_fire_times(cron_schedule: str, tz: str, start_ts: float, end_ts: float, matching_days_cache: dict | None = None) -> tuple[float, ...]:
+    """
+    Returns the POSIX timestamps in [start_ts, end_ts) at which the crontab fires, as APScheduler would fire it.
+    APScheduler's own fields decide which days, hours and minutes match, but each local day is expanded at once
+    instead of stepping the trigger one fire at a time. Pass the same matching_days_cache for calls over one window.
+    """
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.util import localize
+    trigger = CronTrigger.from_crontab(cron_schedule, timezone=tz)
+    fields = {field.name: field for field in trigger.fields}
+    hours = [hour for hour in range(24) if _matches(fields["hour"], datetime(2000, 1, 1, hour))]
+    minutes = [minute for minute in range(60) if _matches(fields["minute"], datetime(2000, 1, 1, 0, minute))]
+    seconds_of_day = [hour * 3600 + minute * 60 for hour in hours for minute in minutes]
+
+    fire_times = set()
+    first_day = datetime.fromtimestamp(start_ts, trigger.timezone).date()
+    last_day = datetime.fromtimestamp(end_ts, trigger.timezone).date()
+    date_fields = [fields[name] for name in DATE_FIELDS]
+    for local in _matching_days(date_fields, first_day, last_day, {} if matching_days_cache is None else matching_days_cache):
+        midnight = localize(local, trigger.timezone).timestamp()
+        if localize(local + timedelta(days=1), trigger.timezone).timestamp() - midnight == 86400:
+            day_fire_times = [midnight + seconds for seconds in seconds_of_day]
+        else:
+            # The UTC offset changes during this day, so localize each fire time
+            day_fire_times = [
+                localize(local + timedelta(seconds=seconds), trigger.timezone).timestamp() for seconds in seconds_of_day
+            ]
+        fire_times.update(ts for ts in day_fire_times if start_ts <= ts < end_ts)
+    return tuple(sorted(fire_times))
+
+def _percentile(values: list[float], percentile: float) -> float:
+    ordered = sorted(values)
+    index = min(max(math.ceil(percentile / 100 * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[index]
+
+class _ProjectStats:
+    __slots__ = ("delays", "concurrency", "peak_concurrency", "missed_slas")
+
+    def __init__(self):
+        self.delays = []
+        self.concurrency = 0
+        self.peak_concurrency = 0
+        self.missed_slas = 0
+
+def simulate(arrivals: list[tuple[float, int, float]], projects: dict[int, tuple[int, float, float, float]],
+             cpu_capacity: float, memory_mb: float | None, aging_seconds: float) -> tuple[dict[int, _ProjectStats], int]:
+    """
+    Replays arrivals, sorted (fire time, project id, SLA deadline) tuples, in virtual time.
+    projects maps a project id to (priority, cpu weight, memory MB, duration seconds).
+    Returns per-project statistics (queue delays, peak concurrency and missed SLAs) and the overall peak concurrency.
+    """
+    stats = {project_id: _ProjectStats() for project_id in projects}
+    sequence = itertools.count()
+    heappush, heappop = heapq.heappush, heapq.heappop
+    waiting = [] # Heap of (-queue key, sequence, arrival, project id, deadline)
+    running = [] # Heap of (end, sequence, project id, cpu, memory)
+    reserved_cpu = reserved_memory = 0.0
+    peak_concurrency = 0
+    i, n = 0, len(arrivals)
+
+    while i < n or running:
+        if running and (i == n or running[0][0] <= arrivals[i][0]):
+            now = running[0][0]
+        else:
+            now = arrivals[i][0]
+        while running and running[0][0] <= now:
+            _, _, project_id, cpu, memory = heappop(running)
+            reserved_cpu -= cpu
+            reserved_memory -= memory
+            stats[project_id].concurrency -= 1
+        if not running:
+            reserved_cpu = reserved_memory = 0.0 # Drop accumulated float error
+        while i < n and arrivals[i][0] <= now:
+            arrival, project_id, deadline = arrivals[i]
+            i += 1
+            # The aging term now / aging_seconds is shared by every waiting run, so ordering by
+            # priority - arrival / aging_seconds matches the admission controller's effective priority at any time
+            key = projects[project_id][0] - arrival / aging_seconds
+            heappush(waiting, (-key, next(sequence), arrival, project_id, deadline))
+
+        # Admit from the head of the queue while runs fit, as the admission controller does
+        while waiting:
+            _, _, arrival, project_id, deadline = waiting[0]
+            _, cpu, memory, duration = projects[project_id]
+            if cpu > cpu_capacity:
+                cpu = cpu_capacity
+            if not fits(cpu, memory, reserved_cpu, reserved_memory, len(running), cpu_capacity, memory_capacity_mb=memory_mb):
+                break
+            heappop(waiting)
+            reserved_cpu += cpu
+            reserved_memory += memory
+            end = now + duration
+            heappush(running, (end, next(sequence), project_id, cpu, memory))
+            project_stats = stats[project_id]
+            project_stats.delays.append(now - arrival)
+            project_stats.concurrency += 1
+            if project_stats.concurrency > project_stats.peak_concurrency:
+                project_stats.peak_concurrency = project_stats.concurrency
+            if end > deadline:
+                project_stats.missed_slas += 1
+            if len(running) > peak_concurrency:
+                peak_concurrency = len(running)
+
+    return stats, peak_concurrency
+
+def run_simulation(db: Session, request: SimulationRequest) -> SimulationReport:
+    """Simulates the stored schedules, with the request's additions, replacements and removals applied."""
+    started = time.perf_counter()
+    start = request.start or datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = start + timedelta(days=request.days)
+    start_ts, end_ts = start.timestamp(), end.timestamp()
+
+    schedules = {("id", s.id): s for s in crud_schedule.get_schedules(db, limit=None)}
+    for schedule_id in request.remove_schedule_ids:
+        schedules.pop(("id", schedule_id), None)
+    for index, override in enumerate(request.schedules):
+        key = ("id", override.id) if override.id is not None else ("new", index)
+        schedules[key] = override
+
+    projects = {p.id: p for p in crud_project.get_projects(db, limit=None)}
+    history = crud_run.get_recent_durations(db)
+    project_params = {}
+    for project_id, project in projects.items():
+        if project_id in request.project_durations:
+            duration = request.project_durations[project_id]
+        elif history.get(project_id):
+            duration = _percentile(history[project_id], request.duration_percentile)
+        else:
+            duration = request.default_duration_seconds
+        cpu, memory = estimate_weights(project)
+        project_params[project_id] = (project.priority or 0, cpu, memory, duration)
+
+    arrivals = []
+    invalid = {}
+    used_projects = set()
+    # Many schedules share a cron expression; the caches live as long as this window
+    fire_times_cache = {}
+    matching_days_cache = {}
+    for key, schedule in schedules.items():
+        label = str(schedule.id) if schedule.id is not None else (schedule.name or f"new #{key[1] + 1}")
+        if schedule.project_id not in project_params:
+            invalid[label] = f"Unknown project {schedule.project_id}"
+            continue
+        try:
+            # Fires shortly after the window still serve as deadlines for the last runs in it
+            cron_key = (schedule.cron_schedule, schedule.timezone or "UTC")
+            fire_times = fire_times_cache.get(cron_key)
+            if fire_times is None:
+                fire_times = fire_times_cache[cron_key] = cron_fire_times(*cron_key, start_ts, end_ts + 86400, matching_days_cache)
+        except Exception as e:
+            invalid[label] = str(e)
+            continue
+        sla = request.sla_seconds.get(schedule.project_id)
+        for index, fire_time in enumerate(fire_times):
+            if fire_time >= end_ts:
+                break
+            if sla is not None:
+                deadline = fire_time + sla
+            else:
+                deadline = fire_times[index + 1] if index + 1 < len(fire_times) else math.inf
+            arrivals.append((fire_time, schedule.project_id, deadline))
+        used_projects.add(schedule.project_id)
+    arrivals.sort()
+
+    stats, peak_concurrency = simulate(
+        arrivals,
+        {project_id: project_params[project_id] for project_id in used_projects},
+        request.cpu_capacity or CPU_CAPACITY,
+        request.memory_mb,
+        request.aging_seconds or AGING_SECONDS,
+    )
+
+    results = []
+    all_delays = []
+    for project_id in sorted(used_projects):
+        project_stats = stats[project_id]
+        delays = project_stats.delays
+        all_delays.extend(delays)
+        results.append(ProjectSimulationResult(
+            project_id=project_id,
+            project_name=projects[project_id].name,
+            runs=len(delays),
+            duration_seconds=project_params[project_id][3],
+            mean_queue_delay_seconds=sum(delays) / len(delays) if delays else 0.0,
+            p95_queue_delay_seconds=_percentile(delays, 95) if delays else 0.0,
+            max_queue_delay_seconds=max(delays, default=0.0),
+            peak_concurrency=project_stats.peak_concurrency,
+            missed_slas=project_stats.missed_slas,
+        ))
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Simulated {len(arrivals)} runs of {len(schedules) - len(invalid)} schedules over {request.days} days in {elapsed:.2f}s.")
+    return SimulationReport(
+        start=start,
+        end=end,
+        schedules=len(schedules) - len(invalid),
+        runs=len(arrivals),
+        peak_concurrency=peak_concurrency,
+        mean_queue_delay_seconds=sum(all_delays) / len(all_delays) if all_delays else 0.0,
+        max_queue_delay_seconds=max(all_delays, default=0.0),
+        missed_slas=sum(result.missed_slas for result in results),
+        projects=results,
+        invalid_schedules=invalid,
+        elapsed_seconds=elapsed,
+    )
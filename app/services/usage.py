@@ -0,0 +1,31 @@
+import os
+import subprocess
+
+class _MeasuredPopen(subprocess.Popen):
+    """Popen that reaps the child with os.wait4, keeping the resource usage of the child and its waited-for descendants."""
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        try:
+            pid, status, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            # Mirrors Popen: the child was reaped elsewhere, so its status is unknown
+            return self.pid, 0
+        if pid == self.pid:
+            self.rusage = rusage
+        return pid, status
+
+def is_supported() -> bool:
+    return hasattr(os, "wait4")
+
+def run_and_measure(command: list[str], cwd: str, env: dict | None = None) -> tuple[subprocess.CompletedProcess, float | None, float | None]:
+    """Like subprocess.run with captured output, also returning (peak memory MB, CPU seconds) where os.wait4 is available."""
+    popen = _MeasuredPopen if is_supported() else subprocess.Popen
+    with popen(command, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True) as process:
+        stdout, stderr = process.communicate()
+        result = subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+    usage = getattr(process, "rusage", None)
+    if usage is None:
+        return result, None, None
+    # ru_maxrss is in KB on Linux
+    return result, usage.ru_maxrss / 1024, usage.ru_utime + usage.ru_stime
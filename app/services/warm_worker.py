@@ -0,0 +1,88 @@
+"""
+Warm worker entry point. This file is executed by a *project's* interpreter (not the orchestrator's),
+so it must only use the standard library.
+
+The worker preloads the modules named on its command line, then reads one JSON request per line
+on stdin: {"script": ..., "args": [...], "cwd": ..., "path": [...]}, where path lists extra import roots. Each request is executed in a forked child,
+so runs start from the warm, preloaded state without leaking state into each other.
+One JSON response per line is written back:
+{"exit_code": ..., "stdout": ..., "stderr": ..., "peak_memory_mb": ..., "cpu_seconds": ...}, where the usage is the forked child's.
+"""
+import importlib
+import json
+import os
+import runpy
+import sys
+import tempfile
+import traceback
+
+def _child(request: dict, stdout_fd: int, stderr_fd: int):
+    exit_code = 0
+    try:
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0) # The request pipe must not be readable by the script
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        os.chdir(request["cwd"])
+        script = os.path.abspath(request["script"])
+        sys.argv = [script] + request.get("args", [])
+        sys.path[:0] = [os.path.dirname(script)] + request.get("path", [])
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
+
+def _run(request: dict) -> dict:
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            _child(request, out.fileno(), err.fileno())
+        _, status, usage = os.wait4(pid, 0)
+        out.seek(0)
+        err.seek(0)
+        return {
+            "exit_code": os.waitstatus_to_exitcode(status),
+            "stdout": out.read().decode(errors="replace"),
+            "stderr": err.read().decode(errors="replace"),
+            "peak_memory_mb": usage.ru_maxrss / 1024, # ru_maxrss is in KB on Linux
+            "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        }
+
+def main():
+    # Running this file put its directory (the orchestrator's app/services) first on sys.path, where it would
+    # shadow project modules such as `events` or `scheduler`
+    worker_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [path for path in sys.path if os.path.abspath(path or os.curdir) != worker_dir]
+
+    # Keep the protocol on a private copy of stdout, so stray prints from preloaded modules go to stderr instead
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(2, 1)
+
+    for module in sys.argv[1:]:
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            print(f"Could not preload module {module}: {e}", file=sys.stderr)
+
+    protocol.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        protocol.write(json.dumps(_run(json.loads(line))) + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import json
+import os
+import select
+import signal
+import subprocess
+import threading
+from app.core.logging_config import get_logger
+
+logger = get_logger()
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_worker.py")
+
+WARM_POOL_SIZE = int(os.getenv("WARM_POOL_SIZE", "2")) # Idle workers kept per environment
+WARM_WORKER_MAX_RUNS = int(os.getenv("WARM_WORKER_MAX_RUNS", "100"))
+WARM_WORKER_MAX_MEMORY_MB = int(os.getenv("WARM_WORKER_MAX_MEMORY_MB", "512")) # Peak of a run's forked child
+WARM_WORKER_START_TIMEOUT_SECONDS = float(os.getenv("WARM_WORKER_START_TIMEOUT_SECONDS", "60")) # Includes preloading
+WARM_WORKER_RUN_TIMEOUT_SECONDS = float(os.getenv("WARM_WORKER_RUN_TIMEOUT_SECONDS", "3600"))
+
+class WarmWorkerError(Exception):
+    pass
+
+def is_supported() -> bool:
+    # Workers fork a child per run, which is not available on Windows
+    return hasattr(os, "fork")
+
+class WarmWorker:
+    def __init__(self, interpreter: list[str], cwd: str, preload: list[str]):
+        try:
+            self.process = subprocess.Popen(
+                interpreter + [WORKER_SCRIPT] + preload,
+                cwd=cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                start_new_session=True, # So a hung worker can be killed together with the child running the script
+            )
+        except OSError as e:
+            raise WarmWorkerError(f"Could not start warm worker: {e}")
+        self.runs = 0
+        self.peak_memory_mb = 0.0
+        # The worker's own stderr carries preload failures, crashes and stray prints from preloaded modules
+        threading.Thread(target=self._log_stderr, name=f"warm-worker-{self.process.pid}-stderr", daemon=True).start()
+        try:
+            self._read_response(WARM_WORKER_START_TIMEOUT_SECONDS) # Wait for the "ready" line
+        except WarmWorkerError:
+            self.kill()
+            raise
+
+    def _log_stderr(self):
+        for line in self.process.stderr:
+            if line.strip():
+                logger.warning(f"Warm worker {self.process.pid}: {line.rstrip()}")
+
+    def _read_response(self, timeout: float) -> dict:
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            raise WarmWorkerError(f"Warm worker did not respond within {timeout:.0f}s")
+        line = self.process.stdout.readline()
+        if not line:
+            raise WarmWorkerError(f"Warm worker exited unexpectedly with code {self.process.poll()}")
+        try:
+            return json.loads(line)
+        except ValueError:
+            raise WarmWorkerError(f"Invalid response from warm worker: {line[:200]!r}")
+
+    def run(self, script: str, args: list[str], cwd: str, import_paths: list[str] | None = None) -> tuple[int, str, str, float | None, float | None]:
+        try:
+            request = {"script": script, "args": args, "cwd": cwd, "path": import_paths or []}
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise WarmWorkerError(f"Could not send request to warm worker: {e}")
+        self.runs += 1
+        try:
+            response = self._read_response(WARM_WORKER_RUN_TIMEOUT_SECONDS)
+        except WarmWorkerError as e:
+            self.kill()
+            # The script may already have done work, so this is reported as a failed run instead of being re-run elsewhere
+            return -1, "", str(e), None, None
+        self.peak_memory_mb = response.get("peak_memory_mb") or 0.0
+        return response["exit_code"], response["stdout"], response["stderr"], response.get("peak_memory_mb"), response.get("cpu_seconds")
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def is_worn_out(self) -> bool:
+        return self.runs >= WARM_WORKER_MAX_RUNS or self.peak_memory_mb > WARM_WORKER_MAX_MEMORY_MB
+
+    def kill(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.process.wait()
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except Exception:
+            self.kill()
+
+class WorkerPool:
+    """
+    Keeps pre-started interpreters per environment (interpreter command, project path, preloaded modules and
+    environment fingerprint), so a resynced environment gets fresh workers instead of modules loaded before the sync.
+    """
+
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key) -> WarmWorker:
+        with self._lock:
+            # Workers of the same project started before its environment changed
+            stale = [other for other in self._idle if other[:3] == key[:3] and other != key]
+            stale_workers = [worker for other in stale for worker in self._idle.pop(other)]
+            idle = self._idle.get(key, [])
+            while idle:
+                worker = idle.pop()
+                if worker.is_alive():
+                    break
+            else:
+                worker = None
+        for stale_worker in stale_workers:
+            stale_worker.close()
+        if worker is not None:
+            return worker
+        interpreter, cwd, preload, _ = key
+        logger.info(f"Starting warm worker for {cwd} with {' '.join(interpreter)}")
+        return WarmWorker(list(interpreter), cwd, list(preload))
+
+    def _release(self, key, worker: WarmWorker):
+        if not worker.is_alive() or worker.is_worn_out():
+            logger.info(f"Recycling warm worker after {worker.runs} runs (last run peaked at {worker.peak_memory_mb:.0f} MB).")
+            worker.close()
+            # Start the replacement in the background, so the next run still finds a warm worker
+            threading.Thread(target=self._prestart, args=(key,), daemon=True).start()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < WARM_POOL_SIZE:
+                idle.append(worker)
+                return
+        worker.close()
+
+    def _prestart(self, key):
+        try:
+            self._release(key, self._acquire(key))
+        except WarmWorkerError as e:
+            logger.warning(f"Could not pre-start warm worker: {e}")
+
+    def run(self, interpreter: list[str], project_path: str, preload: list[str], script: str, args: list[str], cwd: str,
+            import_paths: list[str] | None = None, environment: str = "") -> tuple[int, str, str, float | None, float | None]:
+        """
+        Runs a script in a warm worker and returns (exit code, stdout, stderr, peak memory MB, CPU seconds).
+        environment identifies the synced environment (its fingerprint). Raises WarmWorkerError if no worker could run it.
+        """
+        key = (tuple(interpreter), project_path, tuple(preload), environment)
+        worker = self._acquire(key)
+        try:
+            return worker.run(script, args, cwd, import_paths)
+        finally:
+            self._release(key, worker)
+
+    def shutdown(self):
+        with self._lock:
+            workers = [worker for idle in self._idle.values() for worker in idle]
+            self._idle.clear()
+        for worker in workers:
+            worker.close()
+
+worker_pool = WorkerPool()
@@ -0,0 +1,69 @@
+import threading
+import pytest
+from app.services import admission
+from app.services.admission import AdmissionController, effective_priority, fits
+
+RESERVE = admission.MEMORY_RESERVE_MB
+
+def test_idle_orchestrator_admits_oversized_runs():
+    assert fits(cpu=64, memory_mb=10**6, reserved_cpu=0, reserved_memory_mb=0, running=0, cpu_capacity=4, available_memory_mb=100)
+
+def test_cpu_reservations_and_load_average_limit_admission():
+    assert fits(1, 0, reserved_cpu=3, reserved_memory_mb=0, running=1, cpu_capacity=4)
+    assert not fits(1.5, 0, reserved_cpu=3, reserved_memory_mb=0, running=1, cpu_capacity=4)
+    # Work started outside the orchestrator shows up in the load average
+    assert not fits(1, 0, reserved_cpu=1, reserved_memory_mb=0, running=1, cpu_capacity=4, load_average=3.5)
+
+def test_memory_reserved_by_admitted_runs_counts_against_available_memory():
+    # Runs admitted moments ago have not allocated yet, so MemAvailable still looks free
+    available = 4096 + RESERVE
+    assert fits(1, 1000, reserved_cpu=0, reserved_memory_mb=3000, running=1, cpu_capacity=8, available_memory_mb=available)
+    assert not fits(1, 1200, reserved_cpu=0, reserved_memory_mb=3000, running=1, cpu_capacity=8, available_memory_mb=available)
+
+def test_memory_capacity_is_used_when_available_memory_is_unknown():
+    assert fits(1, 500, reserved_cpu=0, reserved_memory_mb=1500, running=1, cpu_capacity=8, memory_capacity_mb=2048)
+    assert not fits(1, 600, reserved_cpu=0, reserved_memory_mb=1500, running=1, cpu_capacity=8, memory_capacity_mb=2048)
+    # Available memory takes precedence over the capacity
+    assert fits(1, 600, reserved_cpu=0, reserved_memory_mb=1500, running=1, cpu_capacity=8,
+                available_memory_mb=4096 + RESERVE, memory_capacity_mb=2048)
+
+def test_memory_is_unlimited_without_available_memory_or_capacity():
+    assert fits(1, 10**6, reserved_cpu=0, reserved_memory_mb=10**6, running=1, cpu_capacity=8)
+
+def test_waiting_raises_effective_priority():
+    assert effective_priority(0, waited_seconds=120, aging_seconds=60) == 2
+    assert effective_priority(0, waited_seconds=121, aging_seconds=60) > effective_priority(1, waited_seconds=0, aging_seconds=60)
+
+@pytest.fixture
+def controller(monkeypatch):
+    # Only the orchestrator's own reservations count, whatever the host is doing
+    monkeypatch.setattr(admission, "ADMISSION_CONTROL", True)
+    monkeypatch.setattr(admission, "MEMORY_CAPACITY_MB", None)
+    monkeypatch.setattr(admission, "read_load_average", lambda: None)
+    monkeypatch.setattr(admission, "read_available_memory_mb", lambda: None)
+    return AdmissionController()
+
+def test_queued_runs_resume_by_priority_when_capacity_is_released(controller):
+    full = admission.CPU_CAPACITY
+    started = []
+    resumed = threading.Semaphore(0)
+
+    def resume(run_id):
+        def callback():
+            started.append(run_id)
+            resumed.release()
+        return callback
+
+    assert controller.try_admit(1, full, 0, priority=0, resume=resume(1))
+    assert not controller.try_admit(2, full, 0, priority=0, resume=resume(2))
+    assert not controller.try_admit(3, full, 0, priority=5, resume=resume(3))
+    assert [run["run_id"] for run in controller.snapshot()["waiting"]] == [2, 3]
+
+    controller.release(1)
+    assert resumed.acquire(timeout=5)
+    assert started == [3]
+    controller.release(3)
+    assert resumed.acquire(timeout=5)
+    assert started == [3, 2]
+    controller.release(2)
+    assert controller.snapshot()["running"] == []
@@ -0,0 +1,38 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from app.routes.artifacts import _parse_range
+from app.services import artifacts as artifact_store
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    (" bytes=0-0 ", (0, 0)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert _parse_range(header, 1000) == expected
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(ValueError):
+        _parse_range(header, 1000)
+
+@pytest.mark.parametrize("header", ["", "bytes=-", "bytes=50-10", "items=0-10", "bytes=0-10,20-30"])
+def test_ignored_ranges_get_the_full_body(header):
+    assert _parse_range(header, 1000) is None
+
+def test_only_files_written_since_the_run_started_are_collected(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(artifact_store, "ARTIFACT_STORE_DIR", str(tmp_path / "store"))
+    project_path = tmp_path / "project"
+    (project_path / "out").mkdir(parents=True)
+    started_at = datetime.now()
+    (project_path / "out" / "old.csv").write_text("from an earlier run")
+    old = (started_at - timedelta(hours=1)).timestamp()
+    os.utime(project_path / "out" / "old.csv", (old, old))
+    (project_path / "out" / "new.csv").write_text("from this run")
+
+    artifacts = artifact_store.collect_artifacts(db, 1, str(project_path), "out/*.csv", since=started_at)
+    assert [a.path for a in artifacts] == [os.path.join("out", "new.csv")]
@@ -0,0 +1,35 @@
+import os
+import subprocess
+from app.models.project import Project
+from app.models.run import Run
+from app.services import checkouts
+
+def _repository(path):
+    os.makedirs(path)
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+    with open(os.path.join(path, "main.py"), "w") as f:
+        f.write("print('hi')\n")
+    git = ["git", "-C", path, "-c", "user.name=t", "-c", "user.email=t@example.com"]
+    subprocess.run(git + ["add", "main.py"], check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "initial"], check=True)
+
+def test_cleanup_keeps_worktrees_of_runs_still_running(db, tmp_path):
+    _repository(str(tmp_path / "origin"))
+    project = Project(name="p", source_type="GitHub", source_url=str(tmp_path / "origin" / ".git"), source_path=str(tmp_path / "checkouts"),
+                      main_script="main.py", environment_type="venv")
+    db.add(project)
+    db.flush()
+    running = Run(project_id=project.id, status="running")
+    finished = Run(project_id=project.id, status="failed")
+    db.add_all([running, finished])
+    db.commit()
+
+    commit_sha = checkouts.update_repository(project)
+    paths = [checkouts.add_worktree(project, run.id, commit_sha) for run in (running, finished)]
+    # As if another instance sharing the clone were running them
+    for path in paths:
+        checkouts._active_worktrees.discard(os.path.abspath(path))
+    os.makedirs(os.path.join(os.path.dirname(paths[0]), "run-abandoned"))
+
+    assert checkouts.cleanup_stale_worktrees(db, [project]) == 2
+    assert sorted(os.listdir(os.path.dirname(paths[0]))) == [f"run-{running.id}"]
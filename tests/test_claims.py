@@ -0,0 +1,28 @@
+from app.core.instance import INSTANCE_ID
+from app.crud import run as crud_run
+from app.models.project import Project
+from app.models.run import Run
+
+def _run(db, status):
+    project = db.query(Project).first()
+    if project is None:
+        project = Project(name="p", source_type="Local", main_script="main.py", environment_type="venv")
+        db.add(project)
+        db.flush()
+    run = Run(project_id=project.id, status=status)
+    db.add(run)
+    db.commit()
+    return run.id
+
+def test_a_run_is_claimed_once(db):
+    run_id = _run(db, "pending")
+    assert crud_run.claim_run(db, run_id)
+    assert not crud_run.claim_run(db, run_id)
+    run = crud_run.get_run(db, run_id)
+    assert (run.status, run.instance_id) == ("running", INSTANCE_ID)
+    assert run.started_at is not None
+
+def test_queued_runs_are_claimed_but_finished_ones_are_not(db):
+    assert crud_run.claim_run(db, _run(db, "queued"))
+    assert not crud_run.claim_run(db, _run(db, "completed"))
+    assert not crud_run.claim_run(db, _run(db, "failed"))
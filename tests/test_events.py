@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime, timedelta
+from app.models.project import Project
+from app.models.run import Run
+from app.routes import events as events_route
+from app.services.events import EventBus
+
+def test_close_ends_subscribers_even_when_they_are_behind():
+    async def scenario():
+        bus = EventBus(max_queue_size=2)
+        queue = bus.subscribe()
+        for i in range(3):
+            bus.publish({"run_id": i})
+        bus.close()
+        await asyncio.sleep(0) # Lets the deferred deliveries run
+        received = []
+        while (event := await queue.get()) is not None:
+            received.append(event["run_id"])
+        return received
+
+    assert asyncio.run(scenario()) == [1]
+
+def test_current_status_is_sent_for_the_run_or_the_project_first_page(db, monkeypatch):
+    monkeypatch.setattr(events_route, "SessionLocal", lambda: db)
+    project = Project(name="p", source_type="Local", main_script="main.py", environment_type="venv")
+    other = Project(name="q", source_type="Local", main_script="main.py", environment_type="venv")
+    db.add_all([project, other])
+    db.flush()
+    project_id, other_id = project.id, other.id
+    now = datetime.now()
+    db.add_all([
+        Run(project_id=project_id, status="completed", start_time=now - timedelta(minutes=5)),
+        Run(project_id=project_id, status="running", start_time=now),
+        Run(project_id=other_id, status="queued", start_time=now),
+    ])
+    db.commit()
+
+    [event] = events_route.current_status_events(None, 1)
+    assert (event["type"], event["run_id"], event["status"]) == ("status", 1, "completed")
+    assert [e["status"] for e in events_route.current_status_events(project_id, None)] == ["completed", "running"]
+    assert events_route.current_status_events(other_id, 1) == []
+    assert events_route.current_status_events(None, None) == []
@@ -0,0 +1,60 @@
+from app.crud.fleet import export_fleet, import_fleet
+from app.models.project import Project
+from app.models.schedule import Schedule
+from app.routes.fleet import _validate_fleet
+from app.schemas.fleet import Fleet
+
+def _fleet(arguments=None, cron="0 * * * *", extra_schedule=False):
+    schedules = [{"name": "hourly", "cron_schedule": cron}]
+    if extra_schedule:
+        schedules.append({"name": "nightly", "cron_schedule": "0 2 * * *"})
+    return Fleet.model_validate({"projects": [{
+        "name": "etl", "source_type": "Local", "source_path": "/srv/etl", "main_script": "main.py",
+        "environment_type": "venv", "arguments": arguments, "schedules": schedules,
+    }]})
+
+def _summary(changes):
+    return [(change.kind, change.action, change.schedule, change.changes) for change in changes]
+
+def test_dry_run_of_a_new_fleet_lists_creations_and_writes_nothing(db):
+    changes, registered = import_fleet(db, _fleet(), dry_run=True)
+    assert _summary(changes) == [("project", "create", None, {}), ("schedule", "create", "hourly", {})]
+    assert registered == []
+    assert db.query(Project).count() == 0
+    assert db.query(Schedule).count() == 0
+
+def test_dry_run_diffs_against_the_database_without_changing_it(db):
+    import_fleet(db, _fleet())
+    changes, registered = import_fleet(db, _fleet(arguments="--full", cron="30 * * * *", extra_schedule=True), dry_run=True)
+    assert _summary(changes) == [
+        ("project", "update", None, {"arguments": [None, "--full"]}),
+        ("schedule", "update", "hourly", {"cron_schedule": ["0 * * * *", "30 * * * *"]}),
+        ("schedule", "create", "nightly", {}),
+    ]
+    assert registered == []
+    db.expire_all()
+    assert db.query(Project).one().arguments is None
+    assert [schedule.cron_schedule for schedule in db.query(Schedule)] == ["0 * * * *"]
+
+def test_import_applies_the_diff_and_returns_schedules_to_register(db):
+    import_fleet(db, _fleet())
+    changes, registered = import_fleet(db, _fleet(arguments="--full", cron="30 * * * *", extra_schedule=True))
+    assert [change.action for change in changes] == ["update", "update", "create"]
+    assert sorted(schedule.name for schedule in registered) == ["hourly", "nightly"]
+    assert export_fleet(db) == _fleet(arguments="--full", cron="30 * * * *", extra_schedule=True)
+
+    changes, registered = import_fleet(db, export_fleet(db))
+    assert {change.action for change in changes} == {"unchanged"}
+    assert registered == []
+
+def test_validation_reports_every_error_at_once():
+    fleet = Fleet.model_validate({"projects": [
+        {"name": "a", "source_type": "GitHub", "main_script": "main.py", "environment_type": "uv",
+         "schedules": [{"name": "s", "cron_schedule": "not a cron"}, {"name": "s", "cron_schedule": "0 * * * *"}]},
+        {"name": "a", "source_type": "Local", "main_script": "main.py", "environment_type": "uv"},
+    ]})
+    errors = _validate_fleet(fleet)
+    assert len(errors) == 4
+    assert any("source_url" in error for error in errors)
+    assert any("duplicate schedule name 's'" in error for error in errors)
+    assert any("Duplicate project name 'a'" in error for error in errors)
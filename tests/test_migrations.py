@@ -0,0 +1,33 @@
+from app.database import migrations
+from app.database.base import make_engine
+from app.models.project import Project
+from app.models.run import Run
+
+def test_copy_reads_one_snapshot_and_catches_up(tmp_path, monkeypatch):
+    source = make_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    target = make_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    migrations.migrate(source)
+    with source.begin() as connection:
+        connection.execute(Project.__table__.insert(), [{"id": 1, "name": "p", "source_type": "Local", "main_script": "main.py"}])
+        connection.execute(Run.__table__.insert(), [{"id": 1, "project_id": 1, "status": "completed"}])
+
+    copied_runs = []
+    upsert = migrations._upsert
+    def upsert_while_running(connection, table, rows):
+        if table.name == "runs":
+            copied_runs.append([row["id"] for row in rows])
+            if len(copied_runs) == 1:
+                # The orchestrator adds a project and its first run after the projects table was copied
+                with source.begin() as writer:
+                    writer.execute(Project.__table__.insert(), [{"id": 2, "name": "q", "source_type": "Local", "main_script": "main.py"}])
+                    writer.execute(Run.__table__.insert(), [{"id": 2, "project_id": 2, "status": "pending"}])
+        upsert(connection, table, rows)
+    monkeypatch.setattr(migrations, "_upsert", upsert_while_running)
+
+    copied = migrations.copy_database(source, target)
+    assert copied_runs == [[1], [1, 2]] # Not in the first pass, whose projects did not include its parent
+    assert (copied["projects"], copied["runs"]) == (2, 2)
+    with target.connect() as connection:
+        assert connection.exec_driver_sql("SELECT id, project_id FROM runs ORDER BY id").all() == [(1, 1), (2, 2)]
+    source.dispose()
+    target.dispose()
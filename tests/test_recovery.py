@@ -0,0 +1,51 @@
+import threading
+from datetime import datetime
+from app.core import instance
+from app.core.instance import INSTANCE_ID
+from app.models.project import Project
+from app.models.run import Run
+from app.services import recovery
+
+LIVE, GONE = INSTANCE_ID + 1, INSTANCE_ID + 2
+
+def test_runs_of_stopped_instances_are_resubmitted_or_failed(db, monkeypatch):
+    monkeypatch.setattr(recovery, "SessionLocal", lambda: db)
+    monkeypatch.setattr(instance, "live_instance_ids", lambda connection: {INSTANCE_ID, LIVE})
+    resubmitted = []
+    monkeypatch.setattr(recovery, "_execute", resubmitted.append)
+
+    project = Project(name="p", source_type="Local", main_script="main.py", environment_type="venv")
+    db.add(project)
+    db.flush()
+    runs = {
+        name: Run(project_id=project.id, status=status, instance_id=owner, started_at=datetime.now())
+        for name, status, owner in [
+            ("pending", "pending", GONE),
+            ("queued", "queued", None), # Created before runs recorded their instance
+            ("interrupted", "running", GONE),
+            ("elsewhere", "running", LIVE),
+            ("here", "running", INSTANCE_ID),
+            ("finished", "completed", GONE),
+        ]
+    }
+    db.add_all(runs.values())
+    db.commit()
+    ids = {name: run.id for name, run in runs.items()}
+
+    assert recovery.recover_runs() == 3
+    for thread in threading.enumerate():
+        if thread.name.startswith("recovered-run-"):
+            thread.join()
+
+    assert sorted(resubmitted) == sorted([ids["pending"], ids["queued"]])
+    statuses = {name: (db.get(Run, run_id).status, db.get(Run, run_id).instance_id) for name, run_id in ids.items()}
+    assert statuses == {
+        "pending": ("pending", INSTANCE_ID),
+        "queued": ("queued", INSTANCE_ID),
+        "interrupted": ("failed", INSTANCE_ID),
+        "elsewhere": ("running", LIVE),
+        "here": ("running", INSTANCE_ID),
+        "finished": ("completed", GONE),
+    }
+    assert db.get(Run, ids["interrupted"]).log_output == recovery.INTERRUPTED_MESSAGE
+    assert recovery.recover_runs() == 0
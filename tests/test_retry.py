@@ -0,0 +1,98 @@
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from app.main import app
+from app.models.project import Project
+from app.models.run import Run
+from app.models.schedule import Schedule
+from app.schemas.project import ProjectCreate
+from app.services.retry import RETRYABLE_PHASES, RetryPolicy
+
+def _policy(max_attempts=2, backoff_seconds=10, backoff_max_seconds=3600, phases=RETRYABLE_PHASES, exit_codes=()):
+    return RetryPolicy(max_attempts, backoff_seconds, backoff_max_seconds, set(phases), set(exit_codes))
+
+def _failed_run(attempt=1, phase="script", exit_code=1):
+    return Run(attempt=attempt, failure_phase=phase, exit_code=exit_code)
+
+def test_max_attempts_counts_extra_attempts_after_the_first_run():
+    policy = _policy(max_attempts=2)
+    assert policy.should_retry(_failed_run(attempt=1))
+    assert policy.should_retry(_failed_run(attempt=2))
+    assert not policy.should_retry(_failed_run(attempt=3))
+
+def test_zero_attempts_disables_retries():
+    assert not _policy(max_attempts=0).should_retry(_failed_run(attempt=1))
+
+def test_run_without_attempt_counts_as_first_attempt():
+    assert _policy(max_attempts=1).should_retry(_failed_run(attempt=None))
+
+def test_config_failures_are_never_retried():
+    assert not _policy(phases={"git", "sync", "script", "config"}).should_retry(_failed_run(phase="config"))
+
+def test_only_configured_phases_are_retried():
+    policy = _policy(phases={"git"})
+    assert policy.should_retry(_failed_run(phase="git"))
+    assert not policy.should_retry(_failed_run(phase="sync"))
+
+def test_exit_codes_limit_script_failures_only():
+    policy = _policy(exit_codes={75})
+    assert policy.should_retry(_failed_run(exit_code=75))
+    assert not policy.should_retry(_failed_run(exit_code=1))
+    assert policy.should_retry(_failed_run(phase="git", exit_code=None))
+
+@pytest.mark.parametrize("attempt, ceiling", [(1, 10), (2, 20), (3, 40), (10, 300)])
+def test_backoff_doubles_up_to_the_maximum_with_jitter(attempt, ceiling):
+    policy = _policy(backoff_seconds=10, backoff_max_seconds=300)
+    for _ in range(50):
+        assert ceiling / 2 <= policy.backoff_delay(attempt) <= ceiling
+
+def test_schedule_overrides_project_settings():
+    project = Project(retry_max_attempts=1, retry_backoff_seconds=5, retry_on="script", retry_exit_codes="2, 3")
+    policy = RetryPolicy.resolve(project, Schedule(retry_max_attempts=4, retry_backoff_seconds=60))
+    assert policy.max_attempts == 4
+    assert policy.backoff_seconds == 60
+    assert policy.backoff_max_seconds == 3600
+    assert policy.phases == {"script"}
+    assert policy.exit_codes == {2, 3}
+
+def test_project_defaults():
+    policy = RetryPolicy.resolve(Project())
+    assert policy.max_attempts == 0
+    assert policy.backoff_seconds == 30
+    assert policy.phases == RETRYABLE_PHASES
+    assert policy.exit_codes == set()
+
+def test_resolve_ignores_invalid_stored_settings():
+    project = Project(id=7, retry_max_attempts=-1, retry_backoff_seconds=-5, retry_on="git, bogus", retry_exit_codes="1, x")
+    policy = RetryPolicy.resolve(project)
+    assert policy.max_attempts == 0
+    assert policy.backoff_seconds == 0
+    assert policy.phases == RETRYABLE_PHASES
+    assert policy.exit_codes == set()
+
+@pytest.mark.parametrize("field, value", [
+    ("retry_on", "git, bogus"),
+    ("retry_on", "config"),
+    ("retry_exit_codes", "1, x"),
+    ("retry_max_attempts", -1),
+    ("retry_backoff_seconds", -1),
+    ("retry_backoff_max_seconds", -1),
+])
+def test_invalid_retry_settings_are_rejected(field, value):
+    with pytest.raises(ValidationError):
+        ProjectCreate(name="p", source_type="Local", main_script="main.py", environment_type="venv", **{field: value})
+
+def test_valid_retry_settings_are_accepted():
+    project = ProjectCreate(name="p", source_type="Local", main_script="main.py", environment_type="venv",
+                            retry_max_attempts=3, retry_on="git, script", retry_exit_codes="75, 2")
+    assert RetryPolicy.resolve(Project(**project.model_dump())).exit_codes == {75, 2}
+
+def test_invalid_retry_settings_are_refused_when_saved():
+    client = TestClient(app) # No lifespan: the requests fail validation before touching the database
+    form = {"name": "p", "source_type": "Local", "source_path": "/tmp", "main_script": "main.py", "environment_type": "venv"}
+    assert client.post("/projects/add", data={**form, "retry_exit_codes": "1, x"}, follow_redirects=False).status_code == 400
+    assert client.post("/projects/add", data={**form, "retry_max_attempts": "two"}, follow_redirects=False).status_code == 400
+    payload = {"name": "p", "source_type": "Local", "main_script": "main.py", "environment_type": "venv", "retry_on": "bogus"}
+    assert client.post("/api/projects/", json=payload).status_code == 422
+    schedule = {"name": "s", "project_id": 1, "cron_schedule": "0 * * * *", "retry_max_attempts": -1}
+    assert client.post("/api/schedules/", json=schedule).status_code == 422
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from app.models.project import Project
+from app.models.run import Run
+from app.services.run_cache import compute_fingerprint, find_cached_run
+
+def _project(**kwargs):
+    return Project(name="p", source_type="Local", main_script="main.py", environment_type="venv", **kwargs)
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+def test_fingerprint_covers_every_python_file_but_not_environments(tmp_path):
+    _write(tmp_path / "main.py", "import helpers")
+    _write(tmp_path / "helpers" / "util.py", "X = 1")
+    project = _project()
+    fingerprint = compute_fingerprint(project, str(tmp_path))
+    assert compute_fingerprint(project, str(tmp_path)) == fingerprint
+
+    _write(tmp_path / ".venv" / "lib" / "site.py", "installed")
+    _write(tmp_path / "output.csv", "written by the run")
+    assert compute_fingerprint(project, str(tmp_path)) == fingerprint
+
+    _write(tmp_path / "helpers" / "util.py", "X = 2")
+    assert compute_fingerprint(project, str(tmp_path)) != fingerprint
+
+def test_fingerprint_covers_arguments_environment_files_and_inputs(tmp_path):
+    _write(tmp_path / "main.py", "")
+    _write(tmp_path / "data" / "in.csv", "a")
+    project = _project(cache_inputs="data")
+    fingerprint = compute_fingerprint(project, str(tmp_path))
+
+    assert compute_fingerprint(_project(cache_inputs="data", arguments="--all"), str(tmp_path)) != fingerprint
+    _write(tmp_path / "data" / "in.csv", "b")
+    changed_input = compute_fingerprint(project, str(tmp_path))
+    assert changed_input != fingerprint
+    _write(tmp_path / "requirements.txt", "requests")
+    assert compute_fingerprint(project, str(tmp_path)) != changed_input
+
+def _add_run(db, project, fingerprint, status="completed", ended_minutes_ago=10):
+    end_time = datetime.now() - timedelta(minutes=ended_minutes_ago)
+    run = Run(project_id=project.id, status=status, fingerprint=fingerprint, start_time=end_time, end_time=end_time)
+    db.add(run)
+    db.commit()
+    return run
+
+def test_only_the_latest_successful_run_is_reused(db):
+    project = _project()
+    db.add(project)
+    db.commit()
+    _add_run(db, project, "A", ended_minutes_ago=30)
+    run_b = _add_run(db, project, "B", ended_minutes_ago=20)
+    _add_run(db, project, "C", status="failed", ended_minutes_ago=10)
+
+    assert find_cached_run(db, project, "B") == run_b
+    # A matched an older run, but B may have changed the outputs since
+    assert find_cached_run(db, project, "A") is None
+
+def test_cached_run_expires_after_the_ttl(db):
+    project = _project(cache_ttl_seconds=300)
+    db.add(project)
+    db.commit()
+    _add_run(db, project, "A", ended_minutes_ago=10)
+    assert find_cached_run(db, project, "A") is None
+    project.cache_ttl_seconds = 3600
+    assert find_cached_run(db, project, "A") is not None
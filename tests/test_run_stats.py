@@ -0,0 +1,64 @@
+import math
+from datetime import datetime, timedelta
+import pytest
+from app.models.project import Project
+from app.models.run import Run
+from app.models.run_stats import RunStats
+from app.services import run_stats
+from app.services.run_stats import ANOMALY_ZSCORE, MIN_LOG_STDDEV, MIN_SAMPLES, duration_zscore, update_stats
+
+def _stats():
+    return RunStats(scope="project", scope_id=1, run_count=0, success_count=0, duration_samples=0, anomaly_count=0)
+
+def test_no_zscore_until_the_baseline_has_enough_samples():
+    stats = _stats()
+    zscores = [update_stats(stats, run_id, True, 60.0, None) for run_id in range(MIN_SAMPLES + 1)]
+    assert zscores[:MIN_SAMPLES] == [None] * MIN_SAMPLES
+    assert zscores[MIN_SAMPLES] == pytest.approx(0.0)
+
+def test_steady_schedules_use_the_minimum_stddev():
+    stats = _stats()
+    for run_id in range(MIN_SAMPLES):
+        update_stats(stats, run_id, True, 60.0, None)
+    # Zero variance, so a 5% slower run is scored against MIN_LOG_STDDEV rather than flagged
+    assert duration_zscore(stats, 63.0) == pytest.approx(math.log(63 / 60) / MIN_LOG_STDDEV)
+    assert abs(duration_zscore(stats, 63.0)) < ANOMALY_ZSCORE
+
+def test_outliers_are_scored_against_the_previous_baseline_and_counted():
+    stats = _stats()
+    for run_id in range(2 * MIN_SAMPLES):
+        update_stats(stats, run_id, True, 60.0 if run_id % 2 else 80.0, None)
+    mean, stddev = stats.duration_log_mean, math.sqrt(stats.duration_log_var)
+    assert stddev > MIN_LOG_STDDEV
+
+    zscore = update_stats(stats, 100, True, 600.0, None)
+    assert zscore == pytest.approx((math.log(600) - mean) / stddev)
+    assert zscore >= ANOMALY_ZSCORE
+    assert stats.anomaly_count == 1
+    assert stats.duration_log_mean > mean # The outlier is folded in after scoring
+
+    assert update_stats(stats, 101, False, None, None) is None # Failed runs have no duration
+    assert (stats.run_count, stats.success_count, stats.duration_samples) == (2 * MIN_SAMPLES + 2, 2 * MIN_SAMPLES + 1, 2 * MIN_SAMPLES + 1)
+
+def test_schedule_baseline_decides_the_run_flag(db):
+    project = Project(name="p", source_type="Local", main_script="main.py", environment_type="venv")
+    db.add(project)
+    db.flush()
+    now = datetime.now()
+
+    def finish(seconds, schedule_id=None):
+        run = Run(project_id=project.id, schedule_id=schedule_id, status="completed", started_at=now, end_time=now + timedelta(seconds=seconds))
+        db.add(run)
+        db.flush()
+        run_stats.record_run(db, run)
+        db.flush()
+        return run
+
+    for _ in range(MIN_SAMPLES):
+        finish(600) # Slow manual runs widen the project's baseline
+        finish(60, schedule_id=1)
+    scheduled = finish(600, schedule_id=1)
+    assert scheduled.duration_zscore >= ANOMALY_ZSCORE
+    assert scheduled.duration_anomaly
+    project_stats = db.query(RunStats).filter(RunStats.scope == "project").one()
+    assert project_stats.anomaly_count == 0 # The same run is unremarkable for the project as a whole
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from app.models.project import Project
+from app.models.run import Run
+from app.models.schedule import Schedule
+from app.services import scheduler as scheduler_module
+from app.services.scheduler import SchedulerService
+
+def test_sync_jobs_follows_the_database(db, monkeypatch):
+    monkeypatch.setattr(scheduler_module, "SessionLocal", lambda: db)
+    monkeypatch.setattr(scheduler_module, "recover_runs", lambda: 0)
+    project = Project(name="p", source_type="Local", main_script="main.py", environment_type="venv")
+    db.add(project)
+    db.flush()
+    kept = Schedule(name="kept", project_id=project.id, cron_schedule="0 * * * *", timezone="UTC")
+    deleted = Schedule(name="deleted", project_id=project.id, cron_schedule="0 0 * * *", timezone="UTC")
+    db.add_all([kept, deleted])
+    db.commit()
+    project_id, kept_id, deleted_id = project.id, kept.id, deleted.id
+
+    service = SchedulerService(db)
+    service.scheduler.start(paused=True) # Jobs are stored as when leading, but never fire
+    service.sync_jobs()
+    assert {job.id for job in service.scheduler.get_jobs()} == {str(kept_id), str(deleted_id)}
+
+    # Changes saved through another instance
+    db.get(Schedule, kept_id).cron_schedule = "30 * * * *"
+    db.delete(db.get(Schedule, deleted_id))
+    retry_at = datetime.now() + timedelta(minutes=5)
+    failed = Run(project_id=project_id, status="failed", next_retry_at=retry_at)
+    db.add(failed)
+    db.commit()
+    failed_id = failed.id
+
+    service.sync_jobs()
+    assert {job.id for job in service.scheduler.get_jobs()} == {str(kept_id), f"retry-{failed_id}"}
+    assert "minute='30'" in str(service.scheduler.get_job(str(kept_id)).trigger)
+    assert service.scheduler.get_job(f"retry-{failed_id}").trigger.run_date.replace(tzinfo=None) == retry_at
+    service.shutdown()
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from pydantic import ValidationError
+from apscheduler.triggers.cron import CronTrigger
+from app.schemas.simulation import SimulationRequest
+from app.services.simulator import cron_fire_times
+
+def _stepped_fire_times(cron_schedule, tz, start, end):
+    trigger = CronTrigger.from_crontab(cron_schedule, timezone=tz)
+    fire_times = []
+    previous, now = None, start
+    while (fire_time := trigger.get_next_fire_time(previous, now)) and fire_time < end:
+        fire_times.append(fire_time.timestamp())
+        previous, now = fire_time, fire_time + timedelta(microseconds=1)
+    return fire_times
+
+# Clear of the hour that repeats when DST ends, where stepping the trigger does not advance
+@pytest.mark.parametrize("cron_schedule", ["30 4 * * *", "*/20 9-11 * * 0", "0 12 1 * *"])
+def test_fire_times_match_apscheduler_across_a_dst_change(cron_schedule):
+    start = datetime(2026, 10, 20, tzinfo=timezone.utc)
+    end = start + timedelta(days=40)
+    cache = {}
+    fire_times = cron_fire_times(cron_schedule, "Europe/Berlin", start.timestamp(), end.timestamp(), cache)
+    assert list(fire_times) == _stepped_fire_times(cron_schedule, "Europe/Berlin", start, end)
+    assert cron_fire_times(cron_schedule, "Europe/Berlin", start.timestamp(), end.timestamp(), cache) == fire_times
+
+@pytest.mark.parametrize("days", [0, -1, 367])
+def test_simulation_window_is_bounded(days):
+    with pytest.raises(ValidationError):
+        SimulationRequest(days=days)
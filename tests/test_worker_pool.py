@@ -0,0 +1,75 @@
+import logging
+import sys
+import time
+import pytest
+from app.services import worker_pool as pool_module
+from app.services.worker_pool import WorkerPool, is_supported
+
+pytestmark = pytest.mark.skipif(not is_supported(), reason="warm workers need os.fork")
+
+INTERPRETER = [sys.executable]
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool()
+    yield pool
+    pool.shutdown()
+
+def _run(pool, project, source, preload=(), environment=""):
+    (project / "main.py").write_text(source)
+    return pool.run(INTERPRETER, str(project), list(preload), "main.py", [], cwd=str(project), environment=environment)
+
+WORKER_PID = "import os\nprint(os.getppid())\n" # The script runs in a child forked by the worker
+
+@pytest.mark.parametrize("source, exit_code, stderr", [
+    ("print('hello')", 0, ""),
+    ("import sys\nsys.exit(3)", 3, ""),
+    ("raise SystemExit('bad input')", 1, "bad input"),
+    ("raise RuntimeError('boom')", 1, "RuntimeError: boom"),
+])
+def test_exit_codes_and_output(pool, tmp_path, source, exit_code, stderr):
+    code, out, err, peak_memory_mb, cpu_seconds = _run(pool, tmp_path, source)
+    assert code == exit_code
+    assert stderr in err
+    assert peak_memory_mb > 0 and cpu_seconds >= 0
+    if exit_code == 0:
+        assert out == "hello\n"
+
+def test_worker_is_reused_until_max_runs(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(pool_module, "WARM_POOL_SIZE", 1)
+    monkeypatch.setattr(pool_module, "WARM_WORKER_MAX_RUNS", 2)
+    first, second = (_run(pool, tmp_path, WORKER_PID)[1] for _ in range(2))
+    assert first == second
+    time.sleep(0.5) # The replacement is pre-started in the background
+    assert _run(pool, tmp_path, WORKER_PID)[1] != first
+
+def test_worker_is_recycled_after_a_run_exceeding_the_memory_limit(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(pool_module, "WARM_POOL_SIZE", 1)
+    monkeypatch.setattr(pool_module, "WARM_WORKER_MAX_MEMORY_MB", 100)
+    small = _run(pool, tmp_path, WORKER_PID)[1]
+    assert _run(pool, tmp_path, WORKER_PID)[1] == small
+    code, large, _, peak_memory_mb, _ = _run(pool, tmp_path, "data = bytearray(200 * 1024 * 1024)\n" + WORKER_PID)
+    assert code == 0 and large == small and peak_memory_mb > 100
+    assert _run(pool, tmp_path, WORKER_PID)[1] != small
+
+def test_changed_environment_gets_a_new_worker(pool, tmp_path):
+    before = _run(pool, tmp_path, WORKER_PID, environment="lock-a")[1]
+    assert _run(pool, tmp_path, WORKER_PID, environment="lock-a")[1] == before
+    assert _run(pool, tmp_path, WORKER_PID, environment="lock-b")[1] != before
+    assert [key[3] for key in pool._idle] == ["lock-b"]
+
+def test_hung_run_is_killed_after_the_timeout(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(pool_module, "WARM_WORKER_RUN_TIMEOUT_SECONDS", 1)
+    started = time.monotonic()
+    code, _, err, _, _ = _run(pool, tmp_path, "import time\ntime.sleep(60)")
+    assert code == -1 and "did not respond" in err
+    assert time.monotonic() - started < 10
+    assert _run(pool, tmp_path, "print('next')")[:2] == (0, "next\n")
+
+def test_worker_errors_reach_the_application_log(pool, tmp_path, caplog):
+    caplog.set_level(logging.WARNING)
+    assert _run(pool, tmp_path, "print('ok')", preload=["no_such_module_for_tests"])[0] == 0
+    deadline = time.monotonic() + 5
+    while "Could not preload module no_such_module_for_tests" not in caplog.text and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert "Could not preload module no_such_module_for_tests" in caplog.text